@@ -1,5 +1,5 @@
 from __future__ import absolute_import
-from .anneal import Annealer
+from .anneal import Annealer, CancelToken
 
-__all__ = ['Annealer']
+__all__ = ['Annealer', 'CancelToken']
 __version__ = "0.5.0"
@@ -0,0 +1,63 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+
+class Acceptance(object):
+
+    """Base class for deterministic acceptance rules, alternatives to the
+    Metropolis criterion of simulated annealing.
+
+    Set an instance as the `acceptance` attribute of an annealer and
+    `Annealer.anneal` accepts a move exactly when its energy change is no
+    larger than `threshold`, with no exp or random draw per step.  The
+    value T of the cooling schedule, falling from Tmax to Tmin, is the
+    control parameter of the rule; what it means depends on the rule.
+    """
+
+    def threshold(self, T, E, best_energy):
+        """Returns the largest energy change accepted from a state of
+        energy E, when the schedule is at T and the best energy so far is
+        best_energy"""
+        raise NotImplementedError
+
+
+class ThresholdAccepting(Acceptance):
+
+    """Threshold accepting (Dueck and Scheuer): accepts any move which
+    raises the energy by at most T, so T is the threshold.
+
+    Thresholds are on the scale of energy changes, like temperatures, so a
+    schedule from `Annealer.auto` is a reasonable start.
+    """
+
+    def threshold(self, T, E, best_energy):
+        return T
+
+
+class RecordToRecord(Acceptance):
+
+    """Record-to-record travel (Dueck): accepts any move to a state at most
+    T above the best energy found so far, the record.  T is the allowed
+    deviation from the record.
+    """
+
+    def threshold(self, T, E, best_energy):
+        return best_energy + T - E
+
+
+class GreatDeluge(Acceptance):
+
+    """Great deluge (Dueck): accepts any move to a state whose energy is at
+    most T, the water level.
+
+    Tmax and Tmin are the initial and final water levels in units of
+    energy: Tmax around the initial energy and Tmin around the energy
+    hoped for.  The level falls at a constant rain speed with
+    `simanneal.cooling.LinearCooling`, as in the original method, which
+    also allows levels at or below zero.
+    """
+
+    def threshold(self, T, E, best_energy):
+        return T - E
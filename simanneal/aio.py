@@ -0,0 +1,32 @@
+"""Annealing inside an asyncio event loop.
+
+Python 3 only; `Annealer.anneal_async` imports this module on demand so
+that the rest of the package stays importable on Python 2.
+"""
+import asyncio
+
+
+async def anneal_async(annealer, chunk=1000):
+    """Runs annealer.anneal() on the running event loop, handing control
+    back to the loop after every chunk steps, and returns the best state
+    and energy.
+
+    Updates go to annealer.update as in `Annealer.anneal`.  Between
+    chunks annealer.best_state and annealer.best_energy hold the best
+    state found so far, so other tasks can read them while the run goes
+    on.  Cancelling the task, e.g. through `asyncio.wait_for`, stops the
+    run and restores the best state found so far into annealer.state
+    before the `CancelledError` propagates.
+    """
+    run = annealer.iter_anneal(chunk=chunk)
+    try:
+        for snapshot in run:
+            if snapshot is None:
+                await asyncio.sleep(0)
+            else:
+                annealer.update(snapshot.step, snapshot.T, snapshot.E,
+                                snapshot.acceptance, snapshot.improvement)
+    finally:
+        run.close()
+        annealer.reporter.close()
+    return run.result
@@ -3,27 +3,264 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 import abc
+import collections
+import contextlib
 import copy
 import datetime
+import itertools
 import math
+import multiprocessing
+import os
 import pickle
 import random
 import signal
-import sys
+import tempfile
+import threading
 import time
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from .cooling import ExponentialCooling
+from .reporters import StderrReporter, time_string
+from .stats import AnnealStats, clock_ns
+
+
+# exp(-dE / T) is below the smallest nonzero random() for dE > _CUTOFF * T,
+# so such uphill moves are rejected without evaluating the exponential
+_CUTOFF = 53 * math.log(2)
+
 
 def round_figures(x, n):
     """Returns x rounded to n significant figures."""
     return round(x, int(n - math.ceil(math.log10(abs(x)))))
 
 
-def time_string(seconds):
-    """Returns time in seconds as a string formatted HHHH:MM:SS."""
-    s = int(round(seconds))  # round to nearest second
-    h, s = divmod(s, 3600)   # get hours and remainder
-    m, s = divmod(s, 60)     # split remainder into minutes and seconds
-    return '%4i:%02i:%02i' % (h, m, s)
+def _bisect(f, target, lo, hi, iterations=60):
+    """Returns the temperature T between lo and hi at which the increasing
+    function f(T) reaches target, bisecting on a logarithmic scale."""
+    if f(lo) >= target:
+        return lo
+    if f(hi) <= target:
+        return hi
+    for _ in range(iterations):
+        mid = math.sqrt(lo * hi)
+        if f(mid) < target:
+            lo = mid
+        else:
+            hi = mid
+    return math.sqrt(lo * hi)
+
+
+Snapshot = collections.namedtuple(
+    'Snapshot',
+    'step T E best_energy acceptance improvement elapsed')
+
+
+class CancelToken(object):
+
+    """Thread-safe flag for stopping annealing runs from outside.
+
+    Set it as the `cancel_token` of one or more annealers and call
+    `cancel` from any thread: runs using the token in this process raise
+    their user_exit flag and stop at the next step, keeping the best state
+    found so far.  Once a run has ended, user_exit is lowered again if
+    the token raised it, and the annealer can be reused after the token
+    is `reset`.  A flag raised otherwise, e.g. by SIGINT, stays raised.
+
+    Runs also poll the token at every update, so a token built on an event
+    shared between processes, e.g.
+    CancelToken(multiprocessing.Manager().Event()), stops runs in worker
+    processes too, within an update window.  A token on a plain
+    threading.Event cannot reach other processes and travels to them as a
+    new, independent token.
+
+    Parameters
+    event : the underlying event, a new threading.Event by default
+    """
+
+    def __init__(self, event=None):
+        self.event = threading.Event() if event is None else event
+        self._lock = threading.Lock()
+        self._annealers = []
+
+    @property
+    def cancelled(self):
+        """True once `cancel` has been called"""
+        return self.event.is_set()
+
+    def cancel(self):
+        """Stops all runs using the token"""
+        self.event.set()
+        with self._lock:
+            for annealer in self._annealers:
+                self._stop(annealer)
+
+    def reset(self):
+        """Lowers the token again, for the next runs"""
+        self.event.clear()
+
+    def attach(self, annealer):
+        """Registers annealer as running with the token"""
+        with self._lock:
+            self._annealers.append(annealer)
+        if self.cancelled:
+            self._stop(annealer)
+
+    def detach(self, annealer):
+        """Unregisters annealer at the end of its run, and lowers its
+        user_exit flag if the token raised it"""
+        with self._lock:
+            self._annealers = [a for a in self._annealers if a is not annealer]
+        if annealer._token_exit:
+            annealer._token_exit = False
+            annealer.user_exit = False
+
+    def _stop(self, annealer):
+        """Raises the user_exit flag of annealer, noting that the token
+        raised it unless it was raised already"""
+        if not annealer.user_exit:
+            annealer._token_exit = True
+            annealer.user_exit = True
+
+    def __getstate__(self):
+        if isinstance(self.event, type(threading.Event())):
+            return {'event': None}
+        return {'event': self.event}
+
+    def __setstate__(self, state):
+        self.__init__(state['event'])
+
+
+class AnnealIterator(object):
+
+    """Iterates over the `Snapshot` of each update of a run, see
+    `Annealer.iter_anneal`.
+
+    Once the iterator is exhausted or closed, `result` holds the best
+    state and energy, as returned by `Annealer.anneal`.
+    """
+
+    def __init__(self, annealer, snapshots):
+        self.annealer = annealer
+        self.snapshots = snapshots
+        self.started = False
+        self.done = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.started = True
+        try:
+            return next(self.snapshots)
+        except StopIteration:
+            self.done = True
+            raise
+
+    next = __next__
+
+    def close(self):
+        """Stops the run.  The best state found so far is restored as at
+        the end of a complete run.  A run closed before its first step
+        has no result."""
+        self.snapshots.close()
+        self.done = True
+
+    @property
+    def result(self):
+        """(state, energy): the best state and energy of the run"""
+        if not self.done:
+            raise RuntimeError('The run has not finished yet')
+        if not self.started:
+            raise RuntimeError('The run was closed before it started')
+        return self.annealer.best_state, self.annealer.best_energy
+
+
+def _restarted(temperature, start):
+    """Returns a schedule which runs all of temperature over the part of
+    the run after fraction start."""
+    span = 1.0 - start
+
+    def restarted(fraction):
+        return temperature((fraction - start) / span)
+    return restarted
+
+
+def _uniform_arrays(rng):
+    """Returns a function of size drawing that many uniform variates in
+    [0, 1) from a NumPy generator seeded by rng.  NumPy before 1.17, the
+    last releases for Python 2, has no default_rng and uses RandomState."""
+    if hasattr(np.random, 'default_rng'):
+        return np.random.default_rng(rng.getrandbits(64)).random
+    return np.random.RandomState(rng.getrandbits(32)).random_sample
+
+
+def _uniforms(rng, block):
+    """Returns a function returning uniform variates in [0, 1), drawn
+    block at a time from a NumPy generator seeded by rng, or from rng
+    itself without NumPy."""
+    if np is not None:
+        uniform = _uniform_arrays(rng)
+
+        def blocks():
+            while True:
+                yield uniform(block).tolist()
+    else:  # pragma: no cover
+        draw = rng.random
+
+        def blocks():
+            while True:
+                yield [draw() for _ in range(block)]
+    uniforms = itertools.chain.from_iterable(blocks())
+    return getattr(uniforms, '__next__', None) or uniforms.next
+
+
+def _seed_worker(annealer, seed):
+    """Seeds the `random` module and annealer.seed in a worker process
+    with two independent seeds drawn from seed, so that moves drawing from
+    `random` are not correlated with the acceptance test."""
+    rng = random.Random(seed)
+    random.seed(rng.getrandbits(64))
+    annealer.seed = rng.getrandbits(64)
+
+
+def _anneal_run(args):
+    """Runs one seeded anneal in a worker process and returns the
+    pickled best state and its energy."""
+    annealer, seed = args
+    _seed_worker(annealer, seed)
+    signal.signal(signal.SIGINT, annealer.set_user_exit)
+    state, energy = annealer.anneal()
+    return pickle.dumps(state), energy
+
+
+def _temper_worker(conn, annealer, seed):
+    """Runs one replica of `Annealer.temper` in a worker process.
+
+    Sends the initial energy, then receives (T, steps) tasks over conn and
+    answers each with the current energy, best energy, acceptance and
+    improvement rates.  On None, sends back the pickled best state and
+    exits."""
+    _seed_worker(annealer, seed)
+    annealer.random.seed(annealer.seed)
+    # interrupts are handled by the coordinating process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    E = annealer.energy()
+    annealer.best_state = annealer.copy_state(annealer.state)
+    annealer.best_energy = E
+    conn.send((E, E, None, None))
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        T, steps = task
+        E, acceptance, improvement = annealer._sweep(T, steps, E)
+        conn.send((E, annealer.best_energy, acceptance, improvement))
+    conn.send(pickle.dumps(annealer.best_state))
+    conn.close()
 
 
 class Annealer(object):
@@ -41,15 +278,61 @@ class Annealer(object):
     steps = 50000
     updates = 100
     copy_strategy = 'deepcopy'
+    best_tracking = 'eager'
+    cooling = None  # a simanneal.cooling schedule, exponential if None
+    acceptance = None  # a simanneal.acceptance rule, Metropolis if None
+    time_limit = None  # seconds, replaces steps when set
+    target_energy = None
+    stagnation_limit = None  # steps without a new best energy
+    reheat = None  # fraction of Tmax to reheat to on stagnation
+    reheat_windows = 3  # stagnant update windows before reheating
+    reheat_improvement = 0.01  # improvement rate of a stagnant window
+    reporter = StderrReporter()
+    instrument = False
+    batch_size = None  # candidate moves per block, see propose_batch
+    seed = None  # reseeds self.random at the start of each run when set
+    random_block = None  # uniforms to pre-draw at a time, see anneal
+    checkpoint_path = None  # file to write checkpoints of a run to
+    checkpoint_steps = None  # steps between checkpoints
+    checkpoint_seconds = None  # seconds between checkpoints
     user_exit = False
+    _token_exit = False  # user_exit was raised by cancel_token
+    cancel_token = None  # a CancelToken to stop runs from other threads
     save_state_on_exit = False
 
     # placeholders
     best_state = None
     best_energy = None
     start = None
+    stats = None
+    reheats = 0
+
+    # optional: a subclass may define an undo() method which reverts
+    # the most recent move in place, see `anneal`
+    undo = None
 
-    def __init__(self, initial_state=None, load_state=None):
+    # optional: a subclass may define a bounded_move(threshold) method
+    # which may give up on moves above threshold, see `anneal`
+    bounded_move = None
+
+    # optional: batch mode, see `_anneal_batch`, requires a subclass to
+    # define propose_batch(size), which scores `size` candidate moves
+    # against the current state without applying any of them and returns
+    # (moves, dE): the candidates, in any form apply_batch understands,
+    # and a sequence (ideally a NumPy array) of the energy change each
+    # would cause on its own; and apply_batch(moves, accepted), which
+    # applies the accepted candidates, an array of indices into moves in
+    # ascending order, skipping any move that conflicts with one applied
+    # before it, and returns the indices actually applied, or None if all
+    # were
+    propose_batch = None
+    apply_batch = None
+
+    def __init__(self, initial_state=None, load_state=None, seed=None):
+        # the random number generator of the annealer, for moves as well
+        self.random = random.Random(seed)
+        if seed is not None:
+            self.seed = seed
         if initial_state is not None:
             self.state = self.copy_state(initial_state)
         elif load_state:
@@ -58,8 +341,6 @@ class Annealer(object):
             raise ValueError('No valid values supplied for neither \
             initial_state nor load_state')
 
-        signal.signal(signal.SIGINT, self.set_user_exit)
-
     def save_state(self, fname=None):
         """Saves state to pickle"""
         if not fname:
@@ -73,6 +354,27 @@ class Annealer(object):
         with open(fname, 'rb') as fh:
             self.state = pickle.load(fh)
 
+    def save_checkpoint(self, fname, checkpoint):
+        """Pickles a checkpoint of a run to fname atomically: it is written
+        to a temporary file in the same directory first, which then
+        replaces fname, so a crash never leaves a partial checkpoint."""
+        directory = os.path.dirname(os.path.abspath(fname))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                pickle.dump(checkpoint, fh, pickle.HIGHEST_PROTOCOL)
+                fh.flush()
+                os.fsync(fh.fileno())
+            getattr(os, 'replace', os.rename)(tmp, fname)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def load_checkpoint(self, fname):
+        """Loads a checkpoint written by `save_checkpoint`"""
+        with open(fname, 'rb') as fh:
+            return pickle.load(fh)
+
     @abc.abstractmethod
     def move(self):
         """Create a state change"""
@@ -87,14 +389,39 @@ class Annealer(object):
         """Raises the user_exit flag, further iterations are stopped
         """
         self.user_exit = True
+        # a cancel token must not lower the flag again
+        self._token_exit = False
+
+    @contextlib.contextmanager
+    def handling_sigint(self):
+        """Context manager which stops runs on SIGINT (Ctrl-C) instead of
+        raising KeyboardInterrupt, by raising the user_exit flag.  The
+        previous handler is restored on exit.
+
+        Signal handlers are process-wide and can only be installed from
+        the main thread, so this is opt-in:
+
+            with annealer.handling_sigint():
+                state, energy = annealer.anneal()
+        """
+        previous = signal.signal(signal.SIGINT, self.set_user_exit)
+        try:
+            yield self
+        finally:
+            signal.signal(signal.SIGINT,
+                          signal.SIG_DFL if previous is None else previous)
 
     def set_schedule(self, schedule):
         """Takes the output from `auto` and sets the attributes
+
+        An optional 'cooling' entry sets the cooling schedule.
         """
         self.Tmax = schedule['tmax']
         self.Tmin = schedule['tmin']
         self.steps = int(schedule['steps'])
         self.updates = int(schedule['updates'])
+        if 'cooling' in schedule:
+            self.cooling = schedule['cooling']
 
     def copy_state(self, state):
         """Returns an exact copy of the provided state
@@ -103,18 +430,39 @@ class Annealer(object):
         * deepcopy: use copy.deepcopy (slow but reliable)
         * slice: use list slices (faster but only works if state is list-like)
         * method: use the state's copy() method
+        * numpy: use the array's copy() method; copy_into reuses
+          preallocated arrays with numpy.copyto
+        * buffer: use slices; copy_into reuses preallocated buffers with
+          slice assignment (for array.array, bytearray or list states)
         """
         if self.copy_strategy == 'deepcopy':
             return copy.deepcopy(state)
-        elif self.copy_strategy == 'slice':
+        elif self.copy_strategy in ('slice', 'buffer'):
             return state[:]
-        elif self.copy_strategy == 'method':
+        elif self.copy_strategy in ('method', 'numpy'):
             return state.copy()
         else:
             raise RuntimeError('No implementation found for ' +
                                'the self.copy_strategy "%s"' %
                                self.copy_strategy)
 
+    def copy_into(self, state, target):
+        """Copies the provided state into target and returns it
+
+        The 'numpy' and 'buffer' copy strategies overwrite target in place,
+        so annealing allocates nothing once its buffers exist.  Other
+        strategies, or a target of None, return `copy_state(state)`.
+        """
+        if target is None:
+            return self.copy_state(state)
+        elif self.copy_strategy == 'numpy':
+            np.copyto(target, state)
+            return target
+        elif self.copy_strategy == 'buffer':
+            target[:] = state
+            return target
+        return self.copy_state(state)
+
     def update(self, *args, **kwargs):
         """Wrapper for internal update.
 
@@ -125,7 +473,7 @@ class Annealer(object):
         self.default_update(*args, **kwargs)
 
     def default_update(self, step, T, E, acceptance, improvement):
-        """Default update, outputs to stderr.
+        """Default update, outputs to stderr or self.reporter.
 
         Prints the current temperature, energy, acceptance rate,
         improvement rate, elapsed time, and remaining time.
@@ -143,172 +491,839 @@ class Annealer(object):
         increased the energy by thermal excititation.  At low temperatures
         it will tend toward zero as the moves that can decrease the energy
         are exhausted and moves that would increase the energy are no longer
-        thermally accessible."""
+        thermally accessible.
 
-        elapsed = time.time() - self.start
-        if step == 0:
-            print('\n Temperature        Energy    Accept   Improve     Elapsed   Remaining',
-                  file=sys.stderr)
-            print('\r{Temp:12.5f}  {Energy:12.2f}                      {Elapsed:s}            '
-                  .format(Temp=T,
-                          Energy=E,
-                          Elapsed=time_string(elapsed)),
-                  file=sys.stderr, end="")
-            sys.stderr.flush()
-        else:
-            remain = (self.steps - step) * (elapsed / step)
-            print('\r{Temp:12.5f}  {Energy:12.2f}   {Accept:7.2%}   {Improve:7.2%}  {Elapsed:s}  {Remaining:s}'
-                  .format(Temp=T,
-                          Energy=E,
-                          Accept=acceptance,
-                          Improve=improvement,
-                          Elapsed=time_string(elapsed),
-                          Remaining=time_string(remain)),
-                  file=sys.stderr, end="")
-            sys.stderr.flush()
-
-    def anneal(self):
+        The output itself is left to self.reporter, a reporter from
+        `simanneal.reporters`, which by default prints a table to stderr.
+        """
+        self.reporter.update(self, step, T, E, acceptance, improvement)
+
+    def anneal(self, handle_sigint=False, resume_from=None):
         """Minimizes the energy of a system by simulated annealing.
 
         Parameters
-        state : an initial arrangement of the system
+        handle_sigint : stop the run on SIGINT (Ctrl-C), see
+                        `handling_sigint`; main thread only
+        resume_from : a checkpoint file to continue a run from
 
         Returns
         (state, energy): the best state and energy found.
+
+        The temperature falls from Tmax to Tmin following the `cooling`
+        schedule, one of the classes in `simanneal.cooling`.  By default it
+        falls exponentially.  Adaptive schedules instead receive the
+        acceptance and improvement rates of each update window and steer
+        the temperature from them.
+
+        If the subclass defines an `undo` method, rejected moves are rolled
+        back by calling it instead of restoring a copy of the previous
+        state.  `undo` must revert the most recent call to `move` in place;
+        it is never called twice in a row.  The state is then only copied
+        when a new best state is recorded.
+
+        The `best_tracking` attribute controls when the best state is copied:
+
+        * eager: copy the state every time the best energy improves
+        * lazy: only mark the best state as stale and copy it when the
+          energy is about to rise again, at each update and on exit.
+          Without `undo` the previous state copy is reused, so a descent
+          costs no extra copies at all.  With `undo` there is no previous
+          state to fall back on and lazy tracking behaves like eager.
+
+        Uphill moves are accepted with probability exp(-dE / T).  Moves
+        so far uphill that this is below the resolution of random() are
+        rejected without evaluating it.
+
+        If the subclass defines a `bounded_move(threshold)` method, it is
+        called instead of `move`.  The random number of the acceptance
+        test is drawn first, so the largest energy change that will be
+        accepted, threshold = -T * log(u), is known before the move is
+        made.  `bounded_move` makes a move like `move` and returns its
+        energy change, or None, but may stop as soon as a partial energy
+        change exceeds threshold and return any value above threshold:
+        the move is then rejected.  This pays off when the energy change
+        is a sum of many terms, most of which need not be evaluated for a
+        rejected move.  If it stops early, the state must still be
+        restorable, by `undo` if the subclass defines it.
+
+        Instead of the Metropolis criterion, self.acceptance may be set to
+        one of the deterministic rules of `simanneal.acceptance`: threshold
+        accepting, record-to-record travel or great deluge.  The cooling
+        schedule then drives the threshold, deviation or water level of
+        the rule in place of the temperature.  `bounded_move` receives
+        the rule's threshold.
+
+        If self.reheat is set, the run restarts from its best state when
+        it stagnates: after self.reheat_windows update windows in a row
+        whose improvement rate is below self.reheat_improvement, the
+        state is reset to the best state and the cooling schedule starts
+        again from self.reheat * Tmax, falling to Tmin over the rest of
+        the run.  self.reheats counts the restarts.  Reheating requires
+        updates > 1.
+
+        If self.instrument is set, the calls to and time spent in move,
+        energy, state copies and the acceptance test are recorded in
+        self.stats, a `simanneal.stats.AnnealStats`.
+
+        The run stops after self.steps steps, or earlier when
+
+        * time_limit is set: after that many seconds.  The time limit
+          replaces the step budget and the cooling schedule and updates
+          follow the elapsed fraction of the time limit instead.
+        * target_energy is set: as soon as the best energy reaches it.
+        * stagnation_limit is set: after that many steps without a new
+          best energy.
+        * the user_exit flag is raised, e.g. by self.cancel_token or,
+          with handle_sigint, by SIGINT.
+
+        If self.checkpoint_path is set, the whole run is checkpointed to
+        that file every self.checkpoint_steps steps and/or every
+        self.checkpoint_seconds seconds: the step, the current and best
+        states and energies, the update window, the cooling schedule and
+        the states of self.random and the `random` module.
+        anneal(resume_from=path) then continues the run exactly where the
+        checkpoint was taken, as long as the annealer's other attributes
+        are unchanged, random_block is not set and `move` draws its random
+        numbers from self.random or `random`.
+
+        Random numbers are drawn from self.random, a `random.Random` of the
+        annealer's own, which `move` should use as well.  When a seed is
+        passed to the constructor or set as self.seed, self.random is
+        reseeded at the start of every run, so that runs are reproducible.
+        If self.random_block is set, the uniform variates of the Metropolis
+        test are drawn that many at a time from a NumPy generator seeded
+        from self.random.
+
+        If self.batch_size is set, the run is made in batch mode instead:
+        see `_anneal_batch`.
+
+        Progress is handed to `update`; use `iter_anneal` to receive it
+        as a stream of snapshots instead.
+        """
+        if handle_sigint:
+            with self.handling_sigint():
+                return self.anneal(resume_from=resume_from)
+        for snapshot in self.iter_anneal(resume_from=resume_from):
+            self.update(snapshot.step, snapshot.T, snapshot.E,
+                        snapshot.acceptance, snapshot.improvement)
+        self.reporter.close()
+
+        # Return best state and energy
+        return self.best_state, self.best_energy
+
+    def iter_anneal(self, chunk=None, resume_from=None):
+        """Runs `anneal` step by step, as an iterator over snapshots of
+        its progress.
+
+        Returns
+        an `AnnealIterator`, yielding a `Snapshot` (step, T, E,
+        best_energy, acceptance, improvement, elapsed) wherever `anneal`
+        would call `update`.  Snapshots hold no copy of the state.  Once
+        the iterator is exhausted its `result` is the (state, energy)
+        pair `anneal` returns.
+
+        Nothing runs between snapshots, so several annealers can be
+        interleaved in one thread.  Closing the iterator, or dropping it,
+        stops the run early and restores the best state found so far.
+        `update` and `reporter` are not used.
+
+        If chunk is set, the iterator also yields None after every chunk
+        steps, so that a caller can share the thread with other work at a
+        finer grain than the updates.  self.best_state is up to date
+        whenever the iterator yields.  resume_from continues a run from a
+        checkpoint, as in `anneal`.
+
+            run = annealer.iter_anneal()
+            for snapshot in run:
+                metrics.send(snapshot._asdict())
+                if snapshot.best_energy < good_enough:
+                    run.close()
+            state, energy = run.result
         """
+        if self.batch_size:
+            if resume_from is not None:
+                raise ValueError('Batch mode runs cannot be resumed from '
+                                 'a checkpoint')
+            if self.reheat:
+                raise ValueError('Batch mode does not support reheating')
+            snapshots = self._anneal_batch(chunk)
+        else:
+            snapshots = self._anneal(chunk, resume_from)
+        return AnnealIterator(self, snapshots)
+
+    def anneal_async(self, chunk=1000):
+        """Returns a coroutine running `anneal` on an asyncio event loop,
+        which gets control back after every chunk steps.  See
+        `simanneal.aio.anneal_async`; requires Python 3.
+
+            state, energy = await annealer.anneal_async()
+        """
+        from .aio import anneal_async
+        return anneal_async(self, chunk)
+
+    def _snapshot(self, step, T, E, acceptance, improvement):
+        return Snapshot(step, T, E, self.best_energy, acceptance,
+                        improvement, time.time() - self.start)
+
+    def _anneal(self, chunk=None, resume_from=None):
+        """Generator running `anneal`, yielding a `Snapshot` at each
+        update and None every chunk steps."""
         step = 0
         self.start = time.time()
+        if self.best_tracking not in ('eager', 'lazy'):
+            raise RuntimeError('No implementation found for ' +
+                               'the self.best_tracking "%s"' %
+                               self.best_tracking)
+        if self.seed is not None:
+            self.random.seed(self.seed)
+        checkpoint = None
+        if resume_from is not None:
+            checkpoint = self.load_checkpoint(resume_from)
+            self.state = checkpoint['state']
+            random.setstate(checkpoint['random_state'])
+            self.random.setstate(checkpoint['rng_state'])
 
-        # Precompute factor for exponential cooling from Tmax to Tmin
-        if self.Tmin <= 0.0:
-            raise Exception('Exponential cooling requires a minimum "\
-                "temperature greater than zero.')
-        Tfactor = -math.log(self.Tmax / self.Tmin)
+        # Prepare the cooling schedule from Tmax to Tmin
+        if checkpoint is not None:
+            cooling = checkpoint['cooling']
+        else:
+            cooling = self.cooling or ExponentialCooling()
+            cooling.setup(self.Tmax, self.Tmin)
+        temperature = cooling.temperature
+        if cooling.adaptive and self.updates < 2:
+            raise ValueError('Adaptive cooling adjusts the temperature at '
+                             'each update and requires updates > 1.')
+
+        # Reheating restarts the schedule from reheat * Tmax at fraction
+        # segmentStart of the run, after reheatWindows stagnant windows
+        reheat = self.reheat
+        if reheat and self.updates < 2:
+            raise ValueError('Reheating is decided at each update and '
+                             'requires updates > 1.')
+        reheatWindows = self.reheat_windows
+        reheatImprovement = self.reheat_improvement
+        stagnant = 0
+        segmentStart = 0.0
+        self.reheats = 0
+        if checkpoint is not None:
+            segmentStart = checkpoint['segment_start']
+            stagnant = checkpoint['stagnant']
+            self.reheats = checkpoint['reheats']
+            if segmentStart > 0.0:
+                temperature = _restarted(temperature, segmentStart)
+
+        # Bind the callables of the loop, timed if instrumented
+        bounded = self.bounded_move is not None
+        move = self.bounded_move if bounded else self.move
+        energy = self.energy
+        copyPrev = copyRestore = copyBest = self.copy_into
+        exp, log, rand = math.exp, math.log, self.random.random
+        if self.random_block:
+            rand = _uniforms(self.random, int(self.random_block))
+        stats = self.stats = AnnealStats() if self.instrument else None
+        if stats:
+            started = clock_ns()
+            move = stats.timed(move, 'move')
+            energy = stats.timed(energy, 'energy')
+            copyPrev = stats.timed(copyPrev, 'copy_prev')
+            copyRestore = stats.timed(copyRestore, 'copy_restore')
+            copyBest = stats.timed(copyBest, 'copy_best')
+            exp = stats.timed(exp, 'accept')
+            log = stats.timed(log, 'accept')
+            rand = stats.timed(rand, 'accept', counted=False)
+
+        # With a deterministic acceptance rule, or a bounded move, the
+        # largest energy change accepted is known before each move
+        acceptance = self.acceptance
+        thresholded = bounded or acceptance is not None
+        threshold = None
+        if acceptance is not None:
+            limit = acceptance.threshold
+            if stats:
+                limit = stats.timed(limit, 'accept')
+        else:
+            def limit(T, E, best_energy):
+                # 1 - rand() is in (0, 1]
+                return -T * log(1.0 - rand())
 
         # Note initial state
         T = self.Tmax
-        E = self.energy()
-        prevState = self.copy_state(self.state)
+        E = energy() if checkpoint is None else checkpoint['E']
+        undo = self.undo
+        prevState = None if undo else copyPrev(self.state, None)
         prevEnergy = E
+        # while bestStale is set, the current state is a best state
+        # that has not been copied to self.best_state yet
+        lazy = self.best_tracking == 'lazy' and not undo
+        bestStale = lazy
+        self.best_state = None if lazy else copyBest(self.state, None)
+        self.best_energy = E
+        trials = accepts = improves = 0
+        updates = self.updates if self.updates > 1 else 0
+        window = 0
+        nextUpdate = 1.0 / updates if updates else float('inf')
+
+        # Stopping criteria; stopStep tracks both the step budget
+        # and the stagnation limit
+        timeLimit = self.time_limit
+        targetEnergy = self.target_energy
+        stagnationLimit = self.stagnation_limit
+        maxSteps = self.steps if timeLimit is None else float('inf')
+        stopStep = maxSteps
+        if stagnationLimit is not None:
+            stopStep = min(maxSteps, stagnationLimit)
+        if targetEnergy is not None and E <= targetEnergy:
+            stopStep = 0
+
+        if checkpoint is not None:
+            step = checkpoint['step']
+            self.start = time.time() - checkpoint['elapsed']
+            self.best_state = checkpoint['best_state']
+            self.best_energy = checkpoint['best_energy']
+            bestStale = False
+            trials, accepts, improves = checkpoint['counts']
+            window, nextUpdate = checkpoint['window']
+            stopStep = checkpoint['stop_step']
+
+        # The loop pauses every chunk steps to yield, and to write
+        # checkpoints every checkpointSteps steps or checkpointSeconds
+        # seconds, polling the clock every 100 steps
+        checkpointPath = self.checkpoint_path
+        checkpointSteps = self.checkpoint_steps
+        checkpointSeconds = self.checkpoint_seconds
+        if checkpointPath is None:
+            checkpointSteps = checkpointSeconds = None
+        inf = float('inf')
+        nextChunk = step + chunk if chunk else inf
+        nextCheckpoint = step + checkpointSteps if checkpointSteps else inf
+        checkpointTime = time.time() + (checkpointSeconds or inf)
+        poll = 100 if checkpointSeconds else inf
+        nextPause = min(nextChunk, nextCheckpoint, step + poll)
+
+        token = self.cancel_token
+        if token is not None:
+            token.attach(self)
+        try:
+            if self.updates > 0 and checkpoint is None:
+                yield self._snapshot(step, T, E, None, None)
+
+            # Attempt moves to new states
+            while step < stopStep and not self.user_exit:
+                step += 1
+                if timeLimit is None:
+                    fraction = step / self.steps
+                else:
+                    fraction = (time.time() - self.start) / timeLimit
+                    if fraction >= 1.0:
+                        step -= 1
+                        break
+                T = temperature(fraction)
+                if thresholded:
+                    threshold = limit(T, prevEnergy, self.best_energy)
+                    dE = move(threshold) if bounded else move()
+                else:
+                    dE = move()
+                if dE is None:
+                    E = energy()
+                    dE = E - prevEnergy
+                else:
+                    E += dE
+                trials += 1
+                if (dE > threshold if thresholded else
+                        dE > 0.0 and (dE > _CUTOFF * T or
+                                      exp(-dE / T) < rand())):
+                    # Restore previous state
+                    if undo:
+                        undo()
+                    else:
+                        self.state = copyRestore(prevState, self.state)
+                    E = prevEnergy
+                else:
+                    # Accept new state and compare to best state
+                    accepts += 1
+                    if dE < 0.0:
+                        improves += 1
+                    if not undo:
+                        if bestStale and dE > 0.0:
+                            # Leaving the best state, which prevState still
+                            # holds; the stale best becomes the next buffer
+                            self.best_state, prevState = \
+                                prevState, self.best_state
+                            bestStale = False
+                        prevState = copyPrev(self.state, prevState)
+                    prevEnergy = E
+                    if E < self.best_energy:
+                        if lazy:
+                            bestStale = True
+                        else:
+                            self.best_state = copyBest(self.state,
+                                                       self.best_state)
+                        self.best_energy = E
+                        if stagnationLimit is not None:
+                            stopStep = min(maxSteps, step + stagnationLimit)
+                        if targetEnergy is not None and E <= targetEnergy:
+                            break
+                if fraction >= nextUpdate:
+                    if bestStale:
+                        self.best_state = copyBest(self.state, self.best_state)
+                        bestStale = False
+                    cooling.feedback(fraction,
+                                     accepts / trials, improves / trials)
+                    if token is not None and token.cancelled:
+                        token._stop(self)
+                    yield self._snapshot(
+                        step, T, E, accepts / trials, improves / trials)
+                    if reheat:
+                        if improves / trials < reheatImprovement:
+                            stagnant += 1
+                        else:
+                            stagnant = 0
+                        if stagnant >= reheatWindows and fraction < 1.0:
+                            # Restart from the best state, reheated
+                            self.state = copyRestore(self.best_state,
+                                                     self.state)
+                            if not undo:
+                                prevState = copyPrev(self.state, prevState)
+                            E = prevEnergy = self.best_energy
+                            cooling.setup(reheat * self.Tmax, self.Tmin)
+                            segmentStart = fraction
+                            temperature = _restarted(cooling.temperature,
+                                                     segmentStart)
+                            stagnant = 0
+                            self.reheats += 1
+                    trials = accepts = improves = 0
+                    window = max(window + 1, int(fraction * updates))
+                    nextUpdate = (window + 1) / updates
+                if step >= nextPause:
+                    # polling the clock alone leaves a stale best alone
+                    writing = (step >= nextCheckpoint or
+                               time.time() >= checkpointTime)
+                    if bestStale and (writing or step >= nextChunk):
+                        self.best_state = copyBest(self.state, self.best_state)
+                        bestStale = False
+                    if writing:
+                        self.save_checkpoint(checkpointPath, {
+                            'step': step,
+                            'elapsed': time.time() - self.start,
+                            'E': E,
+                            'state': self.state,
+                            'best_state': self.best_state,
+                            'best_energy': self.best_energy,
+                            'counts': (trials, accepts, improves),
+                            'window': (window, nextUpdate),
+                            'stop_step': stopStep,
+                            'cooling': cooling,
+                            'segment_start': segmentStart,
+                            'stagnant': stagnant,
+                            'reheats': self.reheats,
+                            'random_state': random.getstate(),
+                            'rng_state': self.random.getstate()})
+                        if checkpointSteps:
+                            nextCheckpoint = step + checkpointSteps
+                        if checkpointSeconds:
+                            checkpointTime = time.time() + checkpointSeconds
+                    nextPause = min(nextChunk, nextCheckpoint, step + poll)
+                    if step >= nextChunk:
+                        nextChunk = step + chunk
+                        nextPause = min(nextChunk, nextCheckpoint, step + poll)
+                        yield None
+        except GeneratorExit:
+            # closed early, finish the run as if it had been stopped
+            pass
+        finally:
+            if token is not None:
+                token.detach(self)
+
+        if bestStale:
+            self.best_state = copyBest(self.state, self.best_state)
+        self.state = copyRestore(self.best_state, self.state)
+        if stats:
+            stats.steps = step
+            stats.total_ns = clock_ns() - started
+        if self.save_state_on_exit:
+            self.save_state()
+
+    def _anneal_batch(self, chunk=None):
+        """Generator running `anneal` in batch mode, scoring blocks of
+        self.batch_size candidate moves at a time.
+
+        Requires NumPy and the `propose_batch` and `apply_batch` methods.
+        Each block is proposed and scored by the subclass, accepted or
+        rejected at once with a vectorized Metropolis test at the
+        temperature of the start of the block, and the accepted moves
+        are handed to `apply_batch`.  Rejected moves are never applied, so
+        the state is only copied when a block ends at a new best energy.
+
+        Cooling schedules, updates and stopping criteria work as in
+        `anneal`, counting each candidate move as a step.  `undo`,
+        `bounded_move`, `acceptance`, `best_tracking`, `instrument` and
+        checkpoints are not used, and `reheat` is rejected.
+        """
+        if np is None:
+            raise ImportError('Batch mode requires numpy')
+        for hook in ('propose_batch', 'apply_batch'):
+            if getattr(self, hook) is None:
+                raise NotImplementedError(
+                    'Batch mode requires the subclass to define %s' % hook)
+        size = int(self.batch_size)
+        step = 0
+        self.start = time.time()
+        self.stats = None
+
+        cooling = self.cooling or ExponentialCooling()
+        cooling.setup(self.Tmax, self.Tmin)
+        temperature = cooling.temperature
+        if cooling.adaptive and self.updates < 2:
+            raise ValueError('Adaptive cooling adjusts the temperature at '
+                             'each update and requires updates > 1.')
+        if self.seed is not None:
+            self.random.seed(self.seed)
+        uniform = _uniform_arrays(self.random)
+
+        # Note initial state
+        T = self.Tmax
+        E = self.energy()
         self.best_state = self.copy_state(self.state)
         self.best_energy = E
         trials = accepts = improves = 0
-        if self.updates > 0:
-            updateWavelength = self.steps / self.updates
-            self.update(step, T, E, None, None)
-
-        # Attempt moves to new states
-        while step < self.steps and not self.user_exit:
-            step += 1
-            T = self.Tmax * math.exp(Tfactor * step / self.steps)
+        updates = self.updates if self.updates > 1 else 0
+        window = 0
+        nextUpdate = 1.0 / updates if updates else float('inf')
+        nextPause = chunk or float('inf')
+
+        timeLimit = self.time_limit
+        targetEnergy = self.target_energy
+        stagnationLimit = self.stagnation_limit
+        maxSteps = self.steps if timeLimit is None else float('inf')
+        stopStep = maxSteps
+        if stagnationLimit is not None:
+            stopStep = min(maxSteps, stagnationLimit)
+        if targetEnergy is not None and E <= targetEnergy:
+            stopStep = 0
+
+        token = self.cancel_token
+        if token is not None:
+            token.attach(self)
+        try:
+            if self.updates > 0:
+                yield self._snapshot(step, T, E, None, None)
+
+            # Attempt blocks of moves
+            while step < stopStep and not self.user_exit:
+                if timeLimit is None:
+                    fraction = step / self.steps
+                else:
+                    fraction = (time.time() - self.start) / timeLimit
+                    if fraction >= 1.0:
+                        break
+                T = temperature(fraction)
+                moves, dE = self.propose_batch(int(min(size, stopStep - step)))
+                dE = np.asarray(dE, dtype=float)
+                step += len(dE)
+                trials += len(dE)
+                accepted = np.flatnonzero(
+                    (dE <= 0.0) |
+                    (uniform(len(dE)) <= np.exp(np.minimum(-dE / T, 0.0))))
+                if len(accepted):
+                    applied = self.apply_batch(moves, accepted)
+                    if applied is not None:
+                        accepted = np.asarray(applied, dtype=int)
+                    dE = dE[accepted]
+                    E += float(dE.sum())
+                    accepts += len(dE)
+                    improves += int((dE < 0.0).sum())
+                    if E < self.best_energy:
+                        self.best_state = self.copy_into(self.state,
+                                                         self.best_state)
+                        self.best_energy = E
+                        if stagnationLimit is not None:
+                            stopStep = min(maxSteps, step + stagnationLimit)
+                        if targetEnergy is not None and E <= targetEnergy:
+                            break
+                if timeLimit is None:
+                    fraction = step / self.steps
+                if fraction >= nextUpdate:
+                    cooling.feedback(fraction,
+                                     accepts / trials, improves / trials)
+                    if token is not None and token.cancelled:
+                        token._stop(self)
+                    yield self._snapshot(
+                        step, T, E, accepts / trials, improves / trials)
+                    trials = accepts = improves = 0
+                    window = max(window + 1, int(fraction * updates))
+                    nextUpdate = (window + 1) / updates
+                if step >= nextPause:
+                    nextPause = step + chunk
+                    yield None
+        except GeneratorExit:
+            pass
+        finally:
+            if token is not None:
+                token.detach(self)
+
+        self.state = self.copy_into(self.best_state, self.state)
+        if self.save_state_on_exit:
+            self.save_state()
+
+    def anneal_parallel(self, n_runs, workers=None, seed=None):
+        """Runs `anneal` n_runs times from the current state in a pool of
+        worker processes and keeps the best result.
+
+        Parameters
+        n_runs : number of independent anneals
+        workers : number of processes, defaults to the number of CPUs
+        seed : seeds the random seed of each run, for reproducible
+               results; self.seed by default
+
+        The annealer is pickled to each worker, so the subclass and any
+        extra data it holds must be picklable.  Best states are pickled
+        back to this process the same way `save_state` pickles them.
+
+        Returns
+        (state, energy, energies): the best state and energy found, and
+        the best energy of each run in order.
+        """
+        rng = random.Random(self.seed if seed is None else seed)
+        seeds = [rng.randint(0, 2 ** 32 - 1) for _ in range(n_runs)]
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        pool = multiprocessing.Pool(processes=max(1, min(workers, n_runs)))
+        try:
+            results = pool.map(_anneal_run, [(self, s) for s in seeds])
+        finally:
+            pool.close()
+            pool.join()
+
+        energies = [energy for _, energy in results]
+        best = energies.index(min(energies))
+        self.best_state = pickle.loads(results[best][0])
+        self.best_energy = energies[best]
+        self.state = self.copy_state(self.best_state)
+        return self.best_state, self.best_energy, energies
+
+    def temper(self, replicas=8, exchanges=100, seed=None):
+        """Minimizes the energy of a system by parallel tempering
+        (replica exchange).
+
+        Runs one replica of the current state per worker process, each at a
+        fixed temperature of a ladder from Tmax to Tmin, spaced by the
+        cooling schedule (geometric by default).  The
+        replicas anneal for self.steps steps in total, and every
+        steps / exchanges steps neighbouring temperatures are swapped with
+        the Metropolis criterion.  Swapping temperatures instead of states
+        means no state leaves its process until the end of the run.
+
+        Parameters
+        replicas : number of replicas (and worker processes), at least 2
+        exchanges : number of exchange rounds
+        seed : seeds the random seed of each replica; self.seed by default
+
+        Like `anneal_parallel`, the annealer must be picklable.  Replicas
+        always use the Metropolis criterion, whatever self.acceptance.
+        Adaptive cooling schedules have no fixed temperatures to build the
+        ladder from and are rejected with a ValueError.
+
+        Returns
+        (state, energy): the best state and energy found by any replica.
+        """
+        if replicas < 2:
+            raise ValueError('Parallel tempering requires at least 2 replicas')
+        if self.Tmin <= 0.0:
+            raise Exception('Parallel tempering requires a minimum '
+                            'temperature greater than zero.')
+        self.start = time.time()
+        cooling = self.cooling or ExponentialCooling()
+        if cooling.adaptive:
+            raise ValueError('Parallel tempering spaces its temperature '
+                             'ladder by the cooling schedule, which an '
+                             'adaptive schedule cannot provide.')
+        cooling.setup(self.Tmax, self.Tmin)
+        ladder = [cooling.temperature(i / (replicas - 1))
+                  for i in range(replicas)]
+        sweep = max(1, self.steps // exchanges)
+
+        rng = random.Random(self.seed if seed is None else seed)
+        conns, procs = [], []
+        for _ in range(replicas):
+            conn, child_conn = multiprocessing.Pipe()
+            proc = multiprocessing.Process(
+                target=_temper_worker,
+                args=(child_conn, self, rng.randint(0, 2 ** 32 - 1)))
+            proc.daemon = True
+            proc.start()
+            conns.append(conn)
+            procs.append(proc)
+
+        # slot[i] is the replica currently at temperature ladder[i]
+        slot = list(range(replicas))
+        token = self.cancel_token
+        if token is not None:
+            token.attach(self)
+        try:
+            step = 0
+            results = [conn.recv() for conn in conns]
+            if self.updates > 0:
+                updateWavelength = self.steps / self.updates
+                self.update(step, ladder[-1], results[0][0], None, None)
+            while step < self.steps and not self.user_exit:
+                for i, r in enumerate(slot):
+                    conns[r].send((ladder[i], sweep))
+                results = [conn.recv() for conn in conns]
+                step += sweep
+
+                # Exchange neighbours, alternating even and odd pairs
+                for i in range((step // sweep) % 2, replicas - 1, 2):
+                    a, b = slot[i], slot[i + 1]
+                    delta = ((1.0 / ladder[i] - 1.0 / ladder[i + 1]) *
+                             (results[a][0] - results[b][0]))
+                    if delta >= 0.0 or math.exp(delta) > rng.random():
+                        slot[i], slot[i + 1] = b, a
+
+                if self.updates > 1:
+                    if (step // updateWavelength) > ((step - sweep) // updateWavelength):
+                        E, _, acceptance, improvement = results[slot[-1]]
+                        self.update(
+                            step, ladder[-1], E, acceptance, improvement)
+
+            for conn in conns:
+                conn.send(None)
+            best = min(range(replicas), key=lambda r: results[r][1])
+            states = [pickle.loads(conn.recv()) for conn in conns]
+        finally:
+            if token is not None:
+                token.detach(self)
+            for proc in procs:
+                proc.join(1)
+                if proc.is_alive():
+                    proc.terminate()
+
+        self.reporter.close()
+        self.best_state = states[best]
+        self.best_energy = results[best][1]
+        self.state = self.copy_state(self.best_state)
+        return self.best_state, self.best_energy
+
+    def _sweep(self, T, steps, E):
+        """Anneals at constant temperature T for a number of steps, starting
+        from energy E, and records any new best state.
+
+        Returns the final energy, rate of acceptance and rate of improvement.
+        """
+        undo = self.undo
+        prevState = None if undo else self.copy_state(self.state)
+        prevEnergy = E
+        accepts = improves = 0
+        cutoff = _CUTOFF * T
+        for _ in range(steps):
             dE = self.move()
             if dE is None:
                 E = self.energy()
                 dE = E - prevEnergy
             else:
-                E += dE
-            trials += 1
-            if dE > 0.0 and math.exp(-dE / T) < random.random():
-                # Restore previous state
-                self.state = self.copy_state(prevState)
+                E = prevEnergy + dE
+            if dE > 0.0 and (dE > cutoff or
+                             math.exp(-dE / T) < self.random.random()):
+                if undo:
+                    undo()
+                else:
+                    self.state = self.copy_into(prevState, self.state)
                 E = prevEnergy
             else:
-                # Accept new state and compare to best state
                 accepts += 1
                 if dE < 0.0:
                     improves += 1
-                prevState = self.copy_state(self.state)
+                if not undo:
+                    prevState = self.copy_into(self.state, prevState)
                 prevEnergy = E
                 if E < self.best_energy:
-                    self.best_state = self.copy_state(self.state)
+                    self.best_state = self.copy_into(self.state,
+                                                     self.best_state)
                     self.best_energy = E
-            if self.updates > 1:
-                if (step // updateWavelength) > ((step - 1) // updateWavelength):
-                    self.update(
-                        step, T, E, accepts / trials, improves / trials)
-                    trials = accepts = improves = 0
-
-        self.state = self.copy_state(self.best_state)
-        if self.save_state_on_exit:
-            self.save_state()
-
-        # Return best state and energy
-        return self.best_state, self.best_energy
+        return E, float(accepts) / steps, float(improves) / steps
 
     def auto(self, minutes, steps=2000):
         """Explores the annealing landscape and
         estimates optimal temperature settings.
 
-        Returns a dictionary suitable for the `set_schedule` method.
-        """
+        Makes `steps` moves, accepting all of them, and records the energy
+        change of each.  Tmax is the temperature at which 98% of the
+        sampled moves would be accepted.  Tmin is the temperature at which
+        fewer than one of every `steps` moves would be accepted uphill, so
+        the search can no longer escape and improve.  Both are found by
+        bisection over the sample, without further annealing runs.  The
+        state is restored afterwards.
 
-        def run(T, steps):
-            """Anneals a system at constant temperature and returns the state,
-            energy, rate of acceptance, and rate of improvement."""
-            E = self.energy()
-            prevState = self.copy_state(self.state)
-            prevEnergy = E
-            accepts, improves = 0, 0
-            for _ in range(steps):
-                dE = self.move()
-                if dE is None:
-                    E = self.energy()
-                    dE = E - prevEnergy
-                else:
-                    E = prevEnergy + dE
-                if dE > 0.0 and math.exp(-dE / T) < random.random():
-                    self.state = self.copy_state(prevState)
-                    E = prevEnergy
-                else:
-                    accepts += 1
-                    if dE < 0.0:
-                        improves += 1
-                    prevState = self.copy_state(self.state)
-                    prevEnergy = E
-            return E, float(accepts) / steps, float(improves) / steps
+        If self.instrument is set, self.stats records the calls to and
+        time spent in move and energy during the sampling pass.
 
+        Returns a dictionary suitable for the `set_schedule` method.
+        """
         step = 0
         self.start = time.time()
+        if self.seed is not None:
+            self.random.seed(self.seed)
+        move, energy = self.move, self.energy
+        stats = self.stats = AnnealStats() if self.instrument else None
+        if stats:
+            started = clock_ns()
+            move = stats.timed(move, 'move')
+            energy = stats.timed(energy, 'energy')
 
-        # Attempting automatic simulated anneal...
-        # Find an initial guess for temperature
+        # Sample energy changes at infinite temperature
         T = 0.0
-        E = self.energy()
+        E = energy()
         self.update(step, T, E, None, None)
-        while T == 0.0:
-            step += 1
-            dE = self.move()
+        initial_state = self.copy_state(self.state)
+        uphill = []
+        downhill = 0
+        for step in range(1, steps + 1):
+            dE = move()
             if dE is None:
-                dE = self.energy() - E
-            T = abs(dE)
+                dE = energy() - E
+            E += dE
+            if dE > 0.0:
+                uphill.append(dE)
+            elif dE < 0.0:
+                downhill += 1
+        elapsed = time.time() - self.start
+        if stats:
+            stats.steps = steps
+            stats.total_ns = clock_ns() - started
+
+        if not uphill:
+            raise RuntimeError('No moves that increase the energy were found '
+                               'in %i steps, cannot estimate temperatures' %
+                               steps)
+
+        def acceptance(T):
+            return (steps - len(uphill) +
+                    sum(math.exp(-dE / T) for dE in uphill)) / steps
+
+        def uphill_acceptance(T):
+            return sum(math.exp(-dE / T) for dE in uphill) / steps
 
         # Search for Tmax - a temperature that gives 98% acceptance
-        E, acceptance, improvement = run(T, steps)
-
-        step += steps
-        while acceptance > 0.98:
-            T = round_figures(T / 1.5, 2)
-            E, acceptance, improvement = run(T, steps)
-            step += steps
-            self.update(step, T, E, acceptance, improvement)
-        while acceptance < 0.98:
-            T = round_figures(T * 1.5, 2)
-            E, acceptance, improvement = run(T, steps)
-            step += steps
-            self.update(step, T, E, acceptance, improvement)
-        Tmax = T
+        lo, hi = min(uphill) * 1e-3, max(uphill) * 1e3
+        Tmax = round_figures(_bisect(acceptance, 0.98, lo, hi), 2)
 
         # Search for Tmin - a temperature that gives 0% improvement
-        while improvement > 0.0:
-            T = round_figures(T / 1.5, 2)
-            E, acceptance, improvement = run(T, steps)
-            step += steps
-            self.update(step, T, E, acceptance, improvement)
-        Tmin = T
-
-        # Calculate anneal duration
-        elapsed = time.time() - self.start
-        duration = round_figures(int(60.0 * minutes * step / elapsed), 2)
+        Tmin = round_figures(_bisect(uphill_acceptance, 1.0 / steps, lo, hi), 2)
+        Tmin = min(Tmin, Tmax)
+
+        self.update(step, Tmax, E, acceptance(Tmax), downhill / steps)
+        self.reporter.close()
+
+        # Calculate anneal duration, including the state copy each step
+        # of `anneal` makes unless moves can be undone
+        copy_time = 0.0
+        if not self.undo:
+            started = time.time()
+            for _ in range(10):
+                self.copy_state(self.state)
+            copy_time = (time.time() - started) / 10
+        self.state = initial_state
+        step_time = elapsed / steps + copy_time
+        duration = round_figures(int(60.0 * minutes / step_time), 2)
 
         # Don't perform anneal, just return params
         return {'tmax': Tmax, 'tmin': Tmin, 'steps': duration, 'updates': self.updates}
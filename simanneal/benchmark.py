@@ -0,0 +1,254 @@
+"""Benchmarks annealing throughput.
+
+Runs `Annealer.anneal` on a set of synthetic problems for each copy
+strategy and reports steps per second, the share of time spent in
+`move`, `energy` and `copy_state`, and the best energy over wall time.
+Results are written as JSON so that regressions in the annealing loop
+can be tracked over releases and Python versions:
+
+    python -m simanneal.benchmark --output results.json
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+
+from . import __version__
+from .anneal import Annealer
+from .reporters import NullReporter, Reporter
+from .stats import clock_ns
+
+
+class TSPBenchmark(Annealer):
+
+    """Travelling salesman on random cities in the unit square.  Moves swap
+    two cities and return the exact energy delta."""
+
+    def __init__(self, size, rng):
+        points = [(rng.random(), rng.random()) for _ in range(size)]
+        self.distance_matrix = [[math.hypot(ax - bx, ay - by)
+                                 for bx, by in points]
+                                for ax, ay in points]
+        state = list(range(size))
+        rng.shuffle(state)
+        super(TSPBenchmark, self).__init__(initial_state=state)
+
+    def move(self):
+        """Swaps two cities in the route."""
+        state, d = self.state, self.distance_matrix
+        n = len(state)
+        a = self.random.randrange(n)
+        b = self.random.randrange(n)
+        # edge i joins city i and city i + 1
+        edges = set([(a - 1) % n, a, (b - 1) % n, b])
+        before = sum(d[state[i]][state[(i + 1) % n]] for i in edges)
+        state[a], state[b] = state[b], state[a]
+        after = sum(d[state[i]][state[(i + 1) % n]] for i in edges)
+        return after - before
+
+    def energy(self):
+        """Calculates the length of the route."""
+        state, d = self.state, self.distance_matrix
+        return sum(d[state[i - 1]][state[i]] for i in range(len(state)))
+
+
+class ReserveBenchmark(Annealer):
+
+    """Reserve selection modeled on the watershed example: select planning
+    units to meet habitat targets for several species at the least cost,
+    with penalties for missed targets.  Moves toggle one planning unit and
+    leave the energy to a full `energy` call."""
+
+    species = 3
+
+    def __init__(self, size, rng):
+        self.costs = [rng.uniform(1.0, 10.0) for _ in range(size)]
+        self.habitat = [[rng.uniform(0.0, 100.0) for _ in range(size)]
+                        for _ in range(self.species)]
+        self.targets = [0.3 * sum(h) for h in self.habitat]
+        self.penalties = [10.0 * size] * self.species
+        super(ReserveBenchmark, self).__init__(initial_state=[False] * size)
+
+    def move(self):
+        """Adds or removes a planning unit."""
+        i = self.random.randrange(len(self.state))
+        self.state[i] = not self.state[i]
+
+    def energy(self):
+        """Calculates the cost of the reserve plus penalties."""
+        selected = [i for i, s in enumerate(self.state) if s]
+        e = sum(self.costs[i] for i in selected)
+        for habitat, target, penalty in zip(self.habitat, self.targets,
+                                            self.penalties):
+            pct = sum(habitat[i] for i in selected) / target
+            if pct < 1.0:
+                e += penalty / max(pct, 0.1)
+        return e
+
+
+class IsingBenchmark(Annealer):
+
+    """Ising spin glass (a QUBO in spin form) on a periodic square lattice
+    with random +1/-1 couplings.  Moves flip one spin and return the exact
+    energy delta, and can be undone."""
+
+    def __init__(self, size, rng):
+        side = max(2, int(round(math.sqrt(size))))
+        n = side * side
+        self.neighbours = [[] for _ in range(n)]
+        for i in range(n):
+            row, col = divmod(i, side)
+            for j in (row * side + (col + 1) % side,
+                      ((row + 1) % side) * side + col):
+                J = rng.choice((-1.0, 1.0))
+                self.neighbours[i].append((j, J))
+                self.neighbours[j].append((i, J))
+        state = [rng.choice((-1, 1)) for _ in range(n)]
+        super(IsingBenchmark, self).__init__(initial_state=state)
+
+    def move(self):
+        """Flips one spin."""
+        state = self.state
+        i = self.flipped = self.random.randrange(len(state))
+        field = sum(J * state[j] for j, J in self.neighbours[i])
+        state[i] = -state[i]
+        return 2.0 * -state[i] * field
+
+    def undo(self):
+        """Flips the last spin back."""
+        self.state[self.flipped] = -self.state[self.flipped]
+
+    def energy(self):
+        """Calculates the energy, -sum(J * s_i * s_j) over all couplings."""
+        state = self.state
+        return -sum(J * state[i] * state[j]
+                    for i, neighbours in enumerate(self.neighbours)
+                    for j, J in neighbours) / 2.0
+
+
+PROBLEMS = {
+    'tsp': (TSPBenchmark, [20, 200, 2000]),
+    'reserve': (ReserveBenchmark, [1000]),
+    'ising': (IsingBenchmark, [1024]),
+}
+
+COPY_STRATEGIES = ['deepcopy', 'slice']
+
+
+class TraceReporter(Reporter):
+
+    """Records the best energy at each update against wall time."""
+
+    def __init__(self):
+        self.trace = []
+
+    def update(self, annealer, step, T, E, acceptance, improvement):
+        self.trace.append((round(time.time() - annealer.start, 6),
+                           step, annealer.best_energy))
+
+
+def run_benchmark(problem, size, copy_strategy, steps, seed=0):
+    """Anneals one benchmark problem and returns a dict of results.
+
+    Throughput, the best energy and the trace come from a plain run; the
+    shares of each phase from a second, instrumented run with the same
+    seed, so that the timing wrappers do not skew the throughput."""
+    rng = random.Random(seed)
+    annealer = PROBLEMS[problem][0](size, rng)
+    annealer.copy_strategy = copy_strategy
+    annealer.reporter = NullReporter()
+    annealer.seed = seed
+    schedule = annealer.auto(minutes=1, steps=min(steps, 2000))
+    annealer.set_schedule(schedule)
+    annealer.steps = steps
+    annealer.updates = 20
+    initial_state = annealer.copy_state(annealer.state)
+
+    annealer.reporter = TraceReporter()
+    started = clock_ns()
+    state, energy = annealer.anneal()
+    seconds = (clock_ns() - started) / 1e9
+    trace = annealer.reporter.trace
+
+    annealer.state = initial_state
+    annealer.reporter = NullReporter()
+    annealer.instrument = True
+    annealer.anneal()
+    stats = annealer.stats
+
+    return {
+        'problem': problem,
+        'size': size,
+        'copy_strategy': copy_strategy,
+        'steps': steps,
+        'seconds': seconds,
+        'steps_per_second': steps / seconds,
+        'move_share': stats.share('move'),
+        'energy_share': stats.share('energy'),
+        'copy_share': sum(stats.share(phase) for phase in
+                          ('copy_prev', 'copy_restore', 'copy_best')),
+        'accept_share': stats.share('accept'),
+        'overhead_share': stats.share('overhead'),
+        'stats': stats.as_dict(),
+        'best_energy': energy,
+        'trace': trace,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m simanneal.benchmark',
+        description='Benchmarks simanneal annealing throughput.')
+    parser.add_argument('--problem', action='append', choices=sorted(PROBLEMS),
+                        help='problem to run, may be repeated (default: all)')
+    parser.add_argument('--size', action='append', type=int,
+                        help='problem size, may be repeated '
+                             '(default: per problem)')
+    parser.add_argument('--copy-strategy', action='append',
+                        choices=COPY_STRATEGIES,
+                        help='copy strategy, may be repeated (default: all)')
+    parser.add_argument('--steps', type=int, default=20000,
+                        help='annealing steps per run (default: 20000)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write JSON results to this file '
+                                         'instead of stdout')
+    args = parser.parse_args(argv)
+
+    results = []
+    for problem in args.problem or sorted(PROBLEMS):
+        for size in args.size or PROBLEMS[problem][1]:
+            for copy_strategy in args.copy_strategy or COPY_STRATEGIES:
+                result = run_benchmark(problem, size, copy_strategy,
+                                       args.steps, args.seed)
+                results.append(result)
+                print('{problem:>8s} {size:6d} {copy_strategy:>8s} '
+                      '{steps_per_second:10.0f} steps/s  '
+                      'move {move_share:4.0%}  energy {energy_share:4.0%}  '
+                      'copy {copy_share:4.0%}  accept {accept_share:4.0%}  '
+                      'loop {overhead_share:4.0%}  best {best_energy:.2f}'
+                      .format(**result), file=sys.stderr)
+
+    output = {
+        'simanneal': __version__,
+        'python': '%s %s' % (platform.python_implementation(),
+                             platform.python_version()),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(output, fh, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
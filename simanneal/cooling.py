@@ -0,0 +1,187 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import math
+
+
+class Cooling(object):
+
+    """Base class for cooling schedules.
+
+    A cooling schedule maps the fraction of the run completed, from 0.0 at
+    the start to 1.0 at the end, to a temperature.  `Annealer.anneal` calls
+    `setup` once at the start of each run and then `temperature` on every
+    step, so any expensive precomputation belongs in `setup`.
+    """
+
+    # True if the schedule steers by feedback, see `feedback`
+    adaptive = False
+
+    def setup(self, Tmax, Tmin):
+        """Prepares the schedule to cool from Tmax to Tmin"""
+        self.Tmax = Tmax
+        self.Tmin = Tmin
+
+    def temperature(self, fraction):
+        """Returns the temperature after a fraction of the run"""
+        raise NotImplementedError
+
+    def feedback(self, fraction, acceptance, improvement):
+        """Receives the acceptance and improvement rates of each update
+        window.  Ignored unless the schedule is adaptive."""
+        pass
+
+
+def lam_acceptance(fraction):
+    """Returns the target acceptance rate of the modified Lam schedule
+    after a fraction of the run: falling quickly from 100% to 44% over the
+    first 15% of the run, holding at 44% until 65% of the run and then
+    falling exponentially towards zero."""
+    if fraction < 0.15:
+        return 0.44 + 0.56 * 560.0 ** (-fraction / 0.15)
+    elif fraction < 0.65:
+        return 0.44
+    else:
+        return 0.44 * 440.0 ** (-(fraction - 0.65) / 0.35)
+
+
+class ExponentialCooling(Cooling):
+
+    """Exponential cooling from Tmax to Tmin, the default schedule."""
+
+    def setup(self, Tmax, Tmin):
+        if Tmin <= 0.0:
+            raise Exception('Exponential cooling requires a minimum '
+                            'temperature greater than zero.')
+        super(ExponentialCooling, self).setup(Tmax, Tmin)
+        self.Tfactor = -math.log(Tmax / Tmin)
+
+    def temperature(self, fraction):
+        return self.Tmax * math.exp(self.Tfactor * fraction)
+
+
+class LinearCooling(Cooling):
+
+    """Linear cooling from Tmax to Tmin."""
+
+    def temperature(self, fraction):
+        return self.Tmax + (self.Tmin - self.Tmax) * fraction
+
+
+class LogarithmicCooling(Cooling):
+
+    """Logarithmic cooling, T = Tmax / (1 + a * log(1 + scale * fraction)),
+    with a chosen so that the run ends at Tmin.
+
+    Cools quickly at first and very slowly afterwards; a larger scale
+    moves more of the cooling to the start of the run.
+    """
+
+    def __init__(self, scale=1000.0):
+        self.scale = scale
+
+    def setup(self, Tmax, Tmin):
+        if Tmin <= 0.0:
+            raise Exception('Logarithmic cooling requires a minimum '
+                            'temperature greater than zero.')
+        super(LogarithmicCooling, self).setup(Tmax, Tmin)
+        self.a = (Tmax / Tmin - 1.0) / math.log1p(self.scale)
+
+    def temperature(self, fraction):
+        return self.Tmax / (1.0 + self.a * math.log1p(self.scale * fraction))
+
+
+class LundyMeesCooling(Cooling):
+
+    """Lundy-Mees cooling, T(k+1) = T(k) / (1 + beta * T(k)), with beta
+    chosen so that the run ends at Tmin."""
+
+    def setup(self, Tmax, Tmin):
+        if Tmin <= 0.0:
+            raise Exception('Lundy-Mees cooling requires a minimum '
+                            'temperature greater than zero.')
+        super(LundyMeesCooling, self).setup(Tmax, Tmin)
+        self.factor = Tmax / Tmin - 1.0
+
+    def temperature(self, fraction):
+        return self.Tmax / (1.0 + self.factor * fraction)
+
+
+class TableCooling(Cooling):
+
+    """Precomputes another schedule at `size` evenly spaced points and
+    looks temperatures up in the table, so no transcendental functions
+    are evaluated while annealing.
+
+    Parameters
+    size : number of entries in the table
+    cooling : the schedule to tabulate, exponential by default
+    """
+
+    def __init__(self, size=10000, cooling=None):
+        if size < 2:
+            raise ValueError('A cooling table needs at least 2 entries')
+        self.size = size
+        self.cooling = cooling
+
+    def setup(self, Tmax, Tmin):
+        super(TableCooling, self).setup(Tmax, Tmin)
+        cooling = self.cooling or ExponentialCooling()
+        cooling.setup(Tmax, Tmin)
+        last = self.size - 1
+        self.table = [cooling.temperature(i / last) for i in range(self.size)]
+
+    def temperature(self, fraction):
+        i = int(fraction * self.size)
+        return self.table[i if i < self.size else -1]
+
+
+class PlateauCooling(TableCooling):
+
+    """Stepwise cooling, holding the temperature constant for each of
+    `blocks` equal blocks of steps.  The first block runs at Tmax and the
+    last at Tmin.
+
+    Parameters
+    blocks : number of temperature plateaus
+    cooling : the schedule the plateaus follow, exponential by default
+    """
+
+    def __init__(self, blocks=20, cooling=None):
+        super(PlateauCooling, self).__init__(size=blocks, cooling=cooling)
+
+
+class AdaptiveCooling(Cooling):
+
+    """Closed-loop cooling which steers the temperature so that the
+    acceptance rate follows a target trajectory.
+
+    The run starts at Tmax.  After each update window of `Annealer.anneal`
+    the temperature is multiplied by exp(gain * (target - acceptance)), so
+    it falls while too many moves are accepted and rises while too few
+    are.  Tmax does not have to be calibrated with `Annealer.auto` first
+    and Tmin is ignored.  The temperature only changes once per update
+    window, so `updates` should be large enough, 100 or more.
+
+    Parameters
+    target : a function mapping the fraction of the run to a target
+             acceptance rate, modified Lam (`lam_acceptance`) by default
+    gain : how strongly the temperature reacts to the acceptance error
+    """
+
+    adaptive = True
+
+    def __init__(self, target=lam_acceptance, gain=1.0):
+        self.target = target
+        self.gain = gain
+
+    def setup(self, Tmax, Tmin):
+        super(AdaptiveCooling, self).setup(Tmax, Tmin)
+        self.T = Tmax
+
+    def temperature(self, fraction):
+        return self.T
+
+    def feedback(self, fraction, acceptance, improvement):
+        self.T *= math.exp(self.gain * (self.target(fraction) - acceptance))
@@ -0,0 +1,198 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from .shared import SharedArray
+
+# radius of the Earth in miles, as in the salesman example
+EARTH_RADIUS = 3963.0
+
+
+class DistanceMatrix(object):
+
+    """Dense matrix of the distances between n labelled nodes.
+
+    Labels are mapped to the integer indices 0 to n - 1 once, and the
+    distances are held in a contiguous n x n float64 NumPy array, so
+    looking up an edge costs two array indexings instead of two hashes.
+    Use integer tours with it, e.g. a `PermutationAnnealer` state of
+    `matrix.indices(labels)`, and convert the result back with
+    `matrix.labels_of(state)`.
+
+    A matrix built with a path, or loaded, is memory-mapped from that file.
+    Pickling it, e.g. to send it to worker processes, then only sends the
+    path and the labels; each process maps the same file read-only and
+    the operating system shares the pages between them.  A matrix built on
+    a `SharedArray`, e.g. by `share`, likewise pickles as the name of its
+    shared memory block.
+
+    Parameters
+    array : the n x n distances, or a SharedArray of them
+    labels : the node labels, in index order, 0 to n - 1 by default
+
+    Requires NumPy.
+    """
+
+    def __init__(self, array, labels=None):
+        if np is None:
+            raise ImportError('DistanceMatrix requires numpy')
+        self.shared = None
+        if isinstance(array, SharedArray):
+            self.shared = array
+            array = array.array
+        elif not isinstance(array, np.memmap):
+            array = np.ascontiguousarray(array, dtype=np.float64)
+        if array.ndim != 2 or array.shape[0] != array.shape[1]:
+            raise ValueError('A distance matrix must be square, not %r'
+                             % (array.shape,))
+        if labels is None:
+            labels = range(array.shape[0])
+        self.labels = list(labels)
+        if len(self.labels) != array.shape[0]:
+            raise ValueError('%i labels given for %i nodes'
+                             % (len(self.labels), array.shape[0]))
+        self.index = dict((label, i) for i, label in enumerate(self.labels))
+        self.array = array
+        self.path = getattr(array, 'filename', None)
+        # a plain view of the same memory, which indexes faster than a memmap
+        self._rows = array.view(np.ndarray)
+
+    @classmethod
+    def from_coordinates(cls, coordinates, radius=EARTH_RADIUS, path=None,
+                         block=1024):
+        """Builds the great-circle distances between latitude-longitude
+        coordinates in degrees, with the haversine formula.
+
+        coordinates is either a dict mapping labels to (lat, lon) or a
+        sequence of (lat, lon), labelled by position.  Rows are computed
+        `block` at a time, vectorized, so with a path even matrices much
+        larger than memory are written straight to a memory-mapped .npy
+        file.
+        """
+        if np is None:
+            raise ImportError('DistanceMatrix requires numpy')
+        if hasattr(coordinates, 'keys'):
+            labels = list(coordinates.keys())
+            coordinates = [coordinates[label] for label in labels]
+        else:
+            labels = None
+        coords = np.radians(np.asarray(coordinates, dtype=np.float64))
+        lat, lon = coords[:, 0], coords[:, 1]
+        cos_lat = np.cos(lat)
+        n = len(coords)
+
+        if path is None:
+            array = np.empty((n, n), dtype=np.float64)
+        else:
+            array = np.lib.format.open_memmap(
+                path, mode='w+', dtype=np.float64, shape=(n, n))
+        for start in range(0, n, block):
+            stop = min(start + block, n)
+            dlat = lat[np.newaxis, :] - lat[start:stop, np.newaxis]
+            dlon = lon[np.newaxis, :] - lon[start:stop, np.newaxis]
+            h = (np.sin(dlat / 2) ** 2 +
+                 cos_lat[start:stop, np.newaxis] * cos_lat[np.newaxis, :] *
+                 np.sin(dlon / 2) ** 2)
+            array[start:stop] = 2 * radius * np.arcsin(
+                np.sqrt(np.clip(h, 0.0, 1.0)))
+        if path is not None:
+            array.flush()
+            del array
+            array = np.load(path, mmap_mode='r')
+        return cls(array, labels)
+
+    @classmethod
+    def from_dict(cls, distances):
+        """Builds the matrix from a dict of dicts, distances[a][b]."""
+        labels = list(distances.keys())
+        return cls([[distances[a][b] for b in labels] for a in labels],
+                   labels)
+
+    @classmethod
+    def load(cls, path, labels=None, mmap=True):
+        """Loads a matrix saved with `save`, memory-mapped read-only unless
+        mmap is False."""
+        if np is None:
+            raise ImportError('DistanceMatrix requires numpy')
+        return cls(np.load(path, mmap_mode='r' if mmap else None), labels)
+
+    def save(self, path):
+        """Saves the distances to a .npy file, to be loaded with `load`.
+        The labels are not saved."""
+        np.save(path, self.array)
+
+    def share(self):
+        """Returns a copy of the matrix in shared memory, which worker
+        processes map instead of copying.  Call `close` on the copy once
+        the workers are done."""
+        return DistanceMatrix(
+            SharedArray(self.array.astype(np.float64, copy=False)),
+            self.labels)
+
+    def close(self):
+        """Releases the shared memory of a matrix returned by `share`,
+        see `SharedArray.close`.  The matrix raises ValueError
+        afterwards."""
+        if self.shared is not None:
+            self._rows = self.array = None
+            self.shared.close()
+
+    def distance(self, a, b):
+        """Returns the distance from the node at index a to the node at
+        index b, as a Python float.  Faster than matrix[a][b], which
+        builds a view of row a first; `PermutationAnnealer` skips even the
+        method call and binds the underlying ndarray.item."""
+        return self._open().item(a, b)
+
+    def indices(self, labels):
+        """Returns the indices of labels, e.g. to turn a tour of labels
+        into a tour of indices."""
+        index = self.index
+        return [index[label] for label in labels]
+
+    def labels_of(self, indices):
+        """Returns the labels of indices."""
+        labels = self.labels
+        return [labels[i] for i in indices]
+
+    def tour_length(self, tour):
+        """Returns the length of a closed tour of indices."""
+        rows = self._open()
+        tour = np.asarray(tour, dtype=np.intp)
+        return float(rows[tour, np.roll(tour, -1)].sum())
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, i):
+        """Returns row i, so that matrix[a][b] is the distance from the
+        node at index a to the node at index b, as a NumPy scalar.  Use
+        `distance` for single lookups."""
+        return self._open()[i]
+
+    def _open(self):
+        if self._rows is None:
+            raise ValueError('The distance matrix is closed')
+        return self._rows
+
+    def __getstate__(self):
+        if self.shared is not None:
+            return {'shared': self.shared, 'labels': self.labels}
+        if self.path is not None:
+            return {'path': self.path, 'labels': self.labels}
+        return {'array': self.array, 'labels': self.labels}
+
+    def __setstate__(self, state):
+        if 'shared' in state:
+            array = state['shared']
+        elif 'path' in state:
+            array = np.load(state['path'], mmap_mode='r')
+        else:
+            array = state['array']
+        self.__init__(array, state['labels'])
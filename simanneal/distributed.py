@@ -0,0 +1,266 @@
+"""Distributed annealing over TCP with `multiprocessing.managers`.
+
+A `Coordinator` serves the annealer and a queue of tasks.  Workers on any
+number of machines connect to it, anneal the tasks they are given and send
+back their best states, pickled the way `Annealer.save_state` pickles them.
+The run is split into rounds.  Each round, every run anneals its share
+of the cooling schedule.  The coordinator then broadcasts the best state
+found so far, and every run restarts from it in the next round.
+
+On the coordinating machine:
+
+    coordinator = Coordinator(annealer, address=('', 50000), authkey=b'...')
+    state, energy, energies = coordinator.run(n_runs=32)
+
+and on each worker machine:
+
+    python -m simanneal.distributed coordinator-host:50000 --authkey ...
+
+The annealer must be picklable, as for `Annealer.anneal_parallel`, and the
+module defining it importable by the workers.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import argparse
+import pickle
+import random
+import traceback
+from multiprocessing.managers import BaseManager
+
+try:
+    import queue
+except ImportError:  # pragma: no cover
+    import Queue as queue
+
+from .anneal import _seed_worker
+from .cooling import ExponentialCooling
+from .reporters import NullReporter
+
+
+class Job(object):
+
+    """The state shared by a coordinator with its workers: the pickled
+    annealer, the task queue and the result queue.  Lives in the manager
+    process of the coordinator; workers see it through a proxy."""
+
+    def __init__(self, annealer):
+        self._annealer = annealer
+        self._tasks = queue.Queue()
+        self._results = queue.Queue()
+        self._stopped = False
+
+    def annealer(self):
+        """Returns the pickled annealer"""
+        return self._annealer
+
+    def put_task(self, task):
+        self._tasks.put(task)
+
+    def get_task(self):
+        """Waits for the next task, returns None once the job is stopped"""
+        while not self._stopped:
+            try:
+                return self._tasks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
+
+    def put_result(self, result):
+        self._results.put(result)
+
+    def get_result(self, timeout=None):
+        """Waits for the next result, raises RuntimeError after timeout
+        seconds"""
+        try:
+            return self._results.get(timeout=timeout)
+        except queue.Empty:
+            raise RuntimeError('No result from the workers in %s seconds'
+                               % timeout)
+
+    def stop(self):
+        self._stopped = True
+
+
+_job = None
+
+
+def _init_job(annealer):
+    global _job
+    _job = Job(annealer)
+
+
+def _get_job():
+    return _job
+
+
+class JobManager(BaseManager):
+    pass
+
+
+JobManager.register('job', callable=_get_job)
+
+
+def _authkey(authkey):
+    if authkey is not None and not isinstance(authkey, bytes):
+        authkey = authkey.encode('utf-8')
+    return authkey
+
+
+def run_worker(address, authkey=None):
+    """Connects to the coordinator at address, a (host, port) tuple, and
+    anneals the tasks it hands out until the coordinator stops.
+
+    An exception raised by a task is sent back to the coordinator, which
+    raises it from `Coordinator.run`.
+
+    Returns the number of tasks completed."""
+    manager = JobManager(address=tuple(address), authkey=_authkey(authkey))
+    manager.connect()
+    job = manager.job()
+    annealer = pickle.loads(job.annealer())
+    annealer.reporter = NullReporter()
+    initial_state = annealer.copy_state(annealer.state)
+    done = 0
+    try:
+        while True:
+            task = job.get_task()
+            if task is None:
+                break
+            run, seed, Tmax, Tmin, steps, state = task
+            _seed_worker(annealer, seed)
+            annealer.Tmax, annealer.Tmin, annealer.steps = Tmax, Tmin, steps
+            try:
+                if state is None:
+                    annealer.state = annealer.copy_state(initial_state)
+                else:
+                    annealer.state = pickle.loads(state)
+                state, energy = annealer.anneal()
+            except Exception:
+                # hand the error to the coordinator instead of leaving
+                # it waiting for the result
+                job.put_result((run, None, None, traceback.format_exc()))
+                continue
+            job.put_result((run, pickle.dumps(state), energy, None))
+            done += 1
+    except (EOFError, IOError):
+        # the coordinator has shut down
+        pass
+    return done
+
+
+class Coordinator(object):
+
+    """Hands out annealing runs to workers over TCP and keeps the best
+    result.
+
+    Parameters
+    annealer : the annealer to distribute, with its initial state and
+               schedule
+    address : (host, port) to listen on, port 0 for any free port
+    authkey : shared secret workers must present, bytes or str
+    rounds : number of rounds; each run restarts from the global best
+             state at the start of every round but the first
+    timeout : seconds to wait for a result before giving up, None to wait
+              forever
+    """
+
+    def __init__(self, annealer, address=('', 0), authkey=None, rounds=10,
+                 timeout=None):
+        self.annealer = annealer
+        self.rounds = rounds
+        self.timeout = timeout
+        self.manager = JobManager(address=address, authkey=_authkey(authkey))
+        self.job = None
+
+    @property
+    def address(self):
+        """The (host, port) the coordinator listens on, once started"""
+        return self.manager.address
+
+    def start(self):
+        """Starts serving the job, so that workers can connect"""
+        if self.job is None:
+            self.manager.start(_init_job, (pickle.dumps(self.annealer),))
+            self.job = self.manager.job()
+        return self.address
+
+    def close(self):
+        """Stops the workers and the server"""
+        if self.job is not None:
+            self.job.stop()
+            self.job = None
+            self.manager.shutdown()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def run(self, n_runs, seed=None):
+        """Runs n_runs anneals on the workers, each of self.annealer.steps
+        steps in total, and keeps the best result.
+
+        Round r covers the part of the cooling schedule from fraction
+        r / rounds to (r + 1) / rounds, so the runs cool from Tmax to Tmin
+        over all rounds together.  This is exact for the default
+        exponential schedule.  Adaptive schedules are rejected with a
+        ValueError.
+
+        Returns
+        (state, energy, energies): the best state and energy found, and
+        the best energy of each run in order.
+
+        Raises RuntimeError, with the worker's traceback, if a run fails.
+        """
+        annealer = self.annealer
+        cooling = annealer.cooling or ExponentialCooling()
+        if cooling.adaptive:
+            raise ValueError('Distributed runs split the cooling schedule '
+                             'into rounds, which an adaptive schedule '
+                             'cannot provide.')
+        cooling.setup(annealer.Tmax, annealer.Tmin)
+        ladder = [cooling.temperature(r / self.rounds)
+                  for r in range(self.rounds + 1)]
+        steps = max(1, annealer.steps // self.rounds)
+        rng = random.Random(annealer.seed if seed is None else seed)
+        self.start()
+
+        best, best_energy = None, None
+        energies = [None] * n_runs
+        for r in range(self.rounds):
+            for run in range(n_runs):
+                self.job.put_task((run, rng.randint(0, 2 ** 32 - 1),
+                                   ladder[r], ladder[r + 1], steps, best))
+            for _ in range(n_runs):
+                run, state, energy, error = self.job.get_result(self.timeout)
+                if error is not None:
+                    raise RuntimeError('Run %i failed on a worker:\n%s'
+                                       % (run, error))
+                if energies[run] is None or energy < energies[run]:
+                    energies[run] = energy
+                if best_energy is None or energy < best_energy:
+                    best, best_energy = state, energy
+
+        annealer.best_state = pickle.loads(best)
+        annealer.best_energy = best_energy
+        annealer.state = annealer.copy_state(annealer.best_state)
+        return annealer.best_state, annealer.best_energy, energies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m simanneal.distributed',
+        description='Runs a simanneal worker for a distributed coordinator.')
+    parser.add_argument('address', help='host:port of the coordinator')
+    parser.add_argument('--authkey', help='shared secret of the coordinator')
+    args = parser.parse_args(argv)
+    host, port = args.address.rsplit(':', 1)
+    run_worker((host, int(port)), args.authkey)
+
+
+if __name__ == '__main__':
+    main()
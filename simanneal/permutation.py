@@ -0,0 +1,185 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from .anneal import Annealer
+from .distance import DistanceMatrix
+
+
+def _lookup(d):
+    """Returns a function of a and b looking up the distance from node a
+    to node b in the matrix d."""
+    if isinstance(d, DistanceMatrix):
+        return d._rows.item
+    lookup = getattr(d, 'distance', None)
+    if lookup is not None:
+        return lookup
+    if getattr(d, 'ndim', None) == 2:
+        return d.item
+
+    def lookup(a, b):
+        return d[a][b]
+    return lookup
+
+
+class PermutationAnnealer(Annealer):
+
+    """Annealer for routing problems whose state is a closed tour, a list
+    of nodes visited in order and returning to the first.
+
+    The energy is the length of the tour, distance_matrix[a][b] summed
+    over consecutive nodes a and b.  The matrix may be a list of lists, a
+    NumPy array or a `simanneal.distance.DistanceMatrix` with integer
+    nodes, or a dict of dicts keyed by node labels.
+
+    Each move picks one of `move_types` at random and returns the exact
+    change in energy, computed from the few edges the move changes rather
+    than from the whole tour, so the energy of a step costs O(1) distance
+    lookups whatever the number of nodes.  Applying a move still shifts
+    part of the list: O(1) for swap, O(n) list operations for insert and
+    at most n / 2 nodes for reverse.  Every move can be undone, so
+    rejected moves are never restored from a copy.
+
+    * swap: exchanges two nodes
+    * insert: moves one node to another position in the tour
+    * reverse: reverses a section of the tour (a 2-opt move); assumes a
+      symmetric distance matrix
+
+    For asymmetric distances, set move_types = ('swap', 'insert').
+
+    Moves look distances up with `item(a, b)` on the array of a
+    `DistanceMatrix` or on a NumPy array, which returns Python floats
+    faster than indexing a row, or with the matrix's own `distance(a, b)`
+    method when it has one.
+    """
+
+    move_types = ('swap', 'insert', 'reverse')
+    copy_strategy = 'slice'
+
+    def __init__(self, distance_matrix, initial_state=None, load_state=None,
+                 seed=None):
+        self.distance_matrix = distance_matrix
+        self.last_move = None
+        super(PermutationAnnealer, self).__init__(
+            initial_state=initial_state, load_state=load_state, seed=seed)
+
+    @property
+    def distance_matrix(self):
+        return self._distance_matrix
+
+    @distance_matrix.setter
+    def distance_matrix(self, d):
+        self._distance_matrix = d
+        self._distance = _lookup(d)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # the lookup may be a closure, rebuilt from the matrix on unpickling
+        del state['_distance']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._distance = _lookup(self._distance_matrix)
+
+    def energy(self):
+        """Calculates the length of the tour."""
+        state, d = self.state, self.distance_matrix
+        if hasattr(d, 'tour_length'):
+            return d.tour_length(state)
+        d = self._distance
+        e = 0
+        for i in range(len(state)):
+            e += d(state[i - 1], state[i])
+        return e
+
+    def move(self):
+        """Makes a random move of one of the move_types."""
+        rng = self.random
+        move_type = rng.choice(self.move_types)
+        n = len(self.state)
+        i = rng.randrange(n)
+        j = rng.randrange(n)
+        if move_type == 'swap':
+            return self.swap(i, j)
+        elif move_type == 'insert':
+            return self.insert(i, j)
+        elif move_type == 'reverse':
+            return self.reverse(min(i, j), max(i, j))
+        raise RuntimeError('No implementation found for the move type "%s"'
+                           % move_type)
+
+    def undo(self):
+        """Reverts the last move."""
+        move_type, i, j = self.last_move
+        if move_type == 'swap':
+            self.swap(i, j)
+        elif move_type == 'insert':
+            self.state.insert(i, self.state.pop(j))
+        else:
+            self.reverse(i, j)
+
+    def swap(self, i, j):
+        """Exchanges the nodes at positions i and j and returns the change
+        in energy."""
+        state, d = self.state, self._distance
+        n = len(state)
+        # edge k joins the nodes at positions k and k + 1
+        edges = set([(i - 1) % n, i, (j - 1) % n, j])
+        before = 0
+        for k in edges:
+            before += d(state[k], state[(k + 1) % n])
+        state[i], state[j] = state[j], state[i]
+        after = 0
+        for k in edges:
+            after += d(state[k], state[(k + 1) % n])
+        self.last_move = ('swap', i, j)
+        return after - before
+
+    def insert(self, i, j):
+        """Moves the node at position i to position j and returns the
+        change in energy."""
+        state, d = self.state, self._distance
+        n = len(state)
+        node = state[i]
+        prev, succ = state[i - 1], state[(i + 1) % n]
+        dE = d(prev, succ) - d(prev, node) - d(node, succ)
+        # neighbours at position j once the node is removed
+        a = state[j - 1] if j <= i else state[j]
+        k = j if j < i else j + 1
+        b = state[k % n]
+        if a == node:
+            a = prev
+        if b == node:
+            b = succ
+        dE += d(a, node) + d(node, b) - d(a, b)
+        state.insert(j, state.pop(i))
+        self.last_move = ('insert', i, j)
+        return dE
+
+    def reverse(self, i, j):
+        """Reverses the nodes at positions i to j, i <= j, and returns the
+        change in energy.
+
+        If more than half the tour lies between i and j, the rest of the
+        tour is reversed instead, which gives the same closed tour, so at
+        most n / 2 nodes are moved."""
+        state, d = self.state, self._distance
+        n = len(state)
+        if j - i >= n - 1:
+            # reversing the whole tour changes nothing
+            self.last_move = ('reverse', i, i)
+            return 0.0
+        a, b = state[i - 1], state[(j + 1) % n]
+        dE = (d(a, state[j]) + d(state[i], b) -
+              d(a, state[i]) - d(state[j], b))
+        if 2 * (j - i + 1) <= n:
+            state[i:j + 1] = state[j:i - 1 if i else None:-1]
+        else:
+            # the rest of the tour, from j + 1 round to i - 1, is shorter:
+            # reversing it gives the same closed tour, walked backwards
+            rest = (state[j + 1:] + state[:i])[::-1]
+            state[j + 1:] = rest[:n - j - 1]
+            state[:i] = rest[n - j - 1:]
+        self.last_move = ('reverse', i, j)
+        return dE
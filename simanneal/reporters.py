@@ -0,0 +1,183 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import json
+import logging
+import sys
+import threading
+import time
+
+
+def time_string(seconds):
+    """Returns time in seconds as a string formatted HHHH:MM:SS."""
+    s = int(round(seconds))  # round to nearest second
+    h, s = divmod(s, 3600)   # get hours and remainder
+    m, s = divmod(s, 60)     # split remainder into minutes and seconds
+    return '%4i:%02i:%02i' % (h, m, s)
+
+
+def remaining(annealer, step, elapsed):
+    """Estimates the seconds left in the annealer's run after step."""
+    if annealer.time_limit is not None:
+        return max(annealer.time_limit - elapsed, 0.0)
+    return (annealer.steps - step) * (elapsed / step)
+
+
+class Reporter(object):
+
+    """Base class for progress reporters.
+
+    `Annealer.default_update` hands every update to the annealer's
+    `reporter`, so formatting and I/O stay out of the annealing loop.
+    `close` is called when a run finishes.
+    """
+
+    def update(self, annealer, step, T, E, acceptance, improvement):
+        """Reports the progress of annealer after step.  acceptance and
+        improvement are None for the first update of a run."""
+        raise NotImplementedError
+
+    def close(self):
+        """Finishes reporting on a run"""
+        pass
+
+
+class NullReporter(Reporter):
+
+    """Discards all updates."""
+
+    def update(self, annealer, step, T, E, acceptance, improvement):
+        pass
+
+
+class StderrReporter(Reporter):
+
+    """Prints a table to stderr, overwriting the line of the previous
+    update.  The default reporter."""
+
+    def update(self, annealer, step, T, E, acceptance, improvement):
+        elapsed = time.time() - annealer.start
+        if step == 0:
+            print('\n Temperature        Energy    Accept   Improve     Elapsed   Remaining',
+                  file=sys.stderr)
+            print('\r{Temp:12.5f}  {Energy:12.2f}                      {Elapsed:s}            '
+                  .format(Temp=T,
+                          Energy=E,
+                          Elapsed=time_string(elapsed)),
+                  file=sys.stderr, end="")
+            sys.stderr.flush()
+        else:
+            remain = remaining(annealer, step, elapsed)
+            print('\r{Temp:12.5f}  {Energy:12.2f}   {Accept:7.2%}   {Improve:7.2%}  {Elapsed:s}  {Remaining:s}'
+                  .format(Temp=T,
+                          Energy=E,
+                          Accept=acceptance,
+                          Improve=improvement,
+                          Elapsed=time_string(elapsed),
+                          Remaining=time_string(remain)),
+                  file=sys.stderr, end="")
+            sys.stderr.flush()
+
+
+class LoggingReporter(Reporter):
+
+    """Logs each update as one line to a `logging` logger.
+
+    Parameters
+    logger : the logger, 'simanneal' by default
+    level : the level to log at
+    """
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger('simanneal')
+        self.level = level
+
+    def update(self, annealer, step, T, E, acceptance, improvement):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        elapsed = time.time() - annealer.start
+        if step == 0:
+            self.logger.log(self.level, 'step %i: T=%.5f E=%.2f elapsed=%.1fs',
+                            step, T, E, elapsed)
+        else:
+            self.logger.log(self.level,
+                            'step %i: T=%.5f E=%.2f accept=%.2f%% '
+                            'improve=%.2f%% elapsed=%.1fs remaining=%.1fs',
+                            step, T, E, 100 * acceptance, 100 * improvement,
+                            elapsed, remaining(annealer, step, elapsed))
+
+
+class JSONLinesReporter(Reporter):
+
+    """Writes each update as a JSON object on its own line, with the keys
+    step, T, E, best_energy, acceptance, improvement and elapsed.
+
+    Parameters
+    stream : a text file object, stdout by default
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def update(self, annealer, step, T, E, acceptance, improvement):
+        stream = self.stream or sys.stdout
+        stream.write(json.dumps({
+            'step': step,
+            'T': T,
+            'E': E,
+            'best_energy': annealer.best_energy,
+            'acceptance': acceptance,
+            'improvement': improvement,
+            'elapsed': time.time() - annealer.start}) + '\n')
+        stream.flush()
+
+
+class ThreadedReporter(Reporter):
+
+    """Hands updates to another reporter running on a background thread,
+    so a slow terminal or log sink never stalls annealing.
+
+    Each update only replaces a shared snapshot; the thread reports the
+    latest snapshot whenever it is free.  Updates which arrive while the
+    thread is still busy with an earlier one are skipped, except for the
+    last update of a run, which is reported by `close`.
+
+    Parameters
+    reporter : the reporter to run in the background
+    """
+
+    def __init__(self, reporter):
+        self.reporter = reporter
+        self.snapshot = None
+        self.thread = None
+        self.closing = False
+        self.ready = threading.Event()
+
+    def update(self, annealer, step, T, E, acceptance, improvement):
+        self.snapshot = (annealer, step, T, E, acceptance, improvement)
+        if self.thread is None:
+            self.closing = False
+            self.thread = threading.Thread(target=self._run)
+            self.thread.daemon = True
+            self.thread.start()
+        self.ready.set()
+
+    def close(self):
+        if self.thread is None:
+            return
+        self.closing = True
+        self.ready.set()
+        self.thread.join()
+        self.thread = None
+        self.reporter.close()
+
+    def _run(self):
+        while True:
+            self.ready.wait()
+            self.ready.clear()
+            snapshot, self.snapshot = self.snapshot, None
+            if snapshot is not None:
+                self.reporter.update(*snapshot)
+            if self.closing and self.snapshot is None:
+                return
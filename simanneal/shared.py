@@ -0,0 +1,131 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import os
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # pragma: no cover
+    shared_memory = None
+
+
+if shared_memory is not None:
+    class _SharedMemory(shared_memory.SharedMemory):
+
+        """SharedMemory which never unmaps its memory itself.  NumPy views
+        keep the underlying mmap alive, and it is unmapped when the last
+        of them is collected, so no view can outlive the memory."""
+
+        def release(self):
+            """Closes the file descriptor, which the mapping does not
+            need"""
+            fd = getattr(self, '_fd', -1)
+            if fd >= 0:
+                os.close(fd)
+                self._fd = -1
+
+        def __del__(self):
+            self.release()
+
+
+def _attach(name, shape, dtype):
+    return SharedArray.attach(name, shape, dtype)
+
+
+class SharedArray(object):
+
+    """Read-only NumPy array in shared memory, for problem data used by
+    many worker processes.
+
+    The array is copied once into a `multiprocessing.shared_memory` block.
+    Pickling a SharedArray, e.g. as an attribute of an annealer sent to
+    `Annealer.anneal_parallel` or `Annealer.temper` workers, only sends the
+    name of the block, its shape and dtype; each worker maps the same
+    memory instead of receiving a copy, so memory use stays flat as
+    workers are added.
+
+    The process which created the array owns the block and releases it
+    with `close`, or on leaving a with block: the block is unlinked, and
+    its memory is freed once no process maps it any more.  Views of the
+    array still held elsewhere, e.g. by an annealer, stay valid until they
+    are collected; the SharedArray itself raises ValueError once closed.
+    Workers must be started from the owner, e.g. by `multiprocessing`, so
+    that they share its resource tracker.
+
+    Parameters
+    array : the data to share, any array-like with a numeric dtype
+
+    Requires NumPy and Python 3.8 or later.
+    """
+
+    def __init__(self, array=None, _shm=None, _shape=None, _dtype=None):
+        if np is None or shared_memory is None:
+            raise ImportError('SharedArray requires numpy and '
+                              'multiprocessing.shared_memory')
+        if _shm is None:
+            array = np.ascontiguousarray(array)
+            if array.dtype.hasobject:
+                raise ValueError('Cannot share an array of Python objects')
+            shm = _SharedMemory(create=True, size=max(1, array.nbytes))
+            view = np.ndarray(array.shape, array.dtype, buffer=shm.buf)
+            view[...] = array
+            self.owner = True
+        else:
+            shm = _shm
+            view = np.ndarray(_shape, _dtype, buffer=shm.buf)
+            self.owner = False
+        view.flags.writeable = False
+        self.shm = shm
+        self.array = view
+
+    @classmethod
+    def attach(cls, name, shape, dtype):
+        """Maps the shared array with the given name, shape and dtype"""
+        shm = _SharedMemory(name=name)
+        return cls(_shm=shm, _shape=shape, _dtype=np.dtype(dtype))
+
+    def _open(self):
+        if self.shm is None:
+            raise ValueError('The shared array is closed')
+        return self.array
+
+    @property
+    def name(self):
+        """The name of the shared memory block"""
+        self._open()
+        return self.shm.name
+
+    def close(self):
+        """Releases the array, and unlinks the block if this process owns
+        it.  The memory is unmapped now, or once the last view of it
+        still in use elsewhere is collected."""
+        if self.shm is None:
+            return
+        shm, self.shm, self.array = self.shm, None, None
+        if self.owner:
+            shm.unlink()
+        # unmapping here would leave any view still in use pointing at
+        # freed memory
+        shm.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __reduce__(self):
+        array = self._open()
+        return _attach, (self.name, array.shape, array.dtype.str)
+
+    def __len__(self):
+        return len(self._open())
+
+    def __getitem__(self, index):
+        return self._open()[index]
@@ -0,0 +1,86 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+import time
+
+try:
+    clock_ns = time.perf_counter_ns
+except AttributeError:  # pragma: no cover
+    def clock_ns():
+        return int(time.time() * 1e9)
+
+
+class AnnealStats(object):
+
+    """Per-phase call counts and timings of an instrumented run.
+
+    Phases are
+
+    * move: calls to `move`
+    * energy: calls to `energy`, including the full evaluation made when
+      `move` returns None
+    * copy_prev: copies of the state kept to restore rejected moves
+    * copy_restore: copies restoring a previous or best state
+    * copy_best: copies recording a new best state
+    * accept: the exp and random draw of the Metropolis test for
+      uphill moves
+
+    `calls` and `ns` map each phase to its number of calls and total
+    nanoseconds.  `total_ns` is the wall time of the whole run; the part
+    not spent in any phase is the overhead of the annealing loop itself.
+    """
+
+    phases = ('move', 'energy', 'copy_prev', 'copy_restore', 'copy_best',
+              'accept')
+
+    def __init__(self):
+        self.calls = dict.fromkeys(self.phases, 0)
+        self.ns = dict.fromkeys(self.phases, 0)
+        self.steps = 0
+        self.total_ns = 0
+
+    def timed(self, func, phase, counted=True):
+        """Wraps func to time it under phase, and count its calls unless
+        counted is False"""
+        calls, ns = self.calls, self.ns
+
+        def wrapper(*args):
+            started = clock_ns()
+            result = func(*args)
+            ns[phase] += clock_ns() - started
+            if counted:
+                calls[phase] += 1
+            return result
+        return wrapper
+
+    @property
+    def overhead_ns(self):
+        """Nanoseconds spent outside all phases"""
+        return self.total_ns - sum(self.ns.values())
+
+    def share(self, phase):
+        """Returns the fraction of the run spent in phase"""
+        if not self.total_ns:
+            return 0.0
+        if phase == 'overhead':
+            return self.overhead_ns / self.total_ns
+        return self.ns[phase] / self.total_ns
+
+    def as_dict(self):
+        """Returns the stats as a dict of plain values"""
+        return {'steps': self.steps,
+                'total_ns': self.total_ns,
+                'overhead_ns': self.overhead_ns,
+                'calls': dict(self.calls),
+                'ns': dict(self.ns)}
+
+    def __str__(self):
+        lines = ['%-12s %10s %14s %7s' % ('phase', 'calls', 'ns', 'share')]
+        for phase in self.phases:
+            lines.append('%-12s %10i %14i %6.1f%%' % (
+                phase, self.calls[phase], self.ns[phase],
+                100 * self.share(phase)))
+        lines.append('%-12s %10s %14i %6.1f%%' % (
+            'overhead', '', self.overhead_ns, 100 * self.share('overhead')))
+        return '\n'.join(lines)
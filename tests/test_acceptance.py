@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from helper import cities, distance_matrix
+from simanneal.acceptance import GreatDeluge, RecordToRecord, \
+    ThresholdAccepting
+from simanneal.cooling import LinearCooling
+from simanneal.permutation import PermutationAnnealer
+from simanneal.reporters import NullReporter
+
+
+def make_tsp(acceptance, Tmax, Tmin):
+    init_state = sorted(cities.keys())
+    random.Random(0).shuffle(init_state)
+    tsp = PermutationAnnealer(distance_matrix, initial_state=init_state,
+                              seed=1)
+    tsp.acceptance = acceptance
+    tsp.cooling = LinearCooling()
+    tsp.Tmax, tsp.Tmin = Tmax, Tmin
+    tsp.steps = 20000
+    tsp.updates = 100
+    tsp.reporter = NullReporter()
+    return tsp
+
+
+def test_threshold_accepting():
+    tsp = make_tsp(ThresholdAccepting(), 0.0, 0.0)
+    E0 = tsp.energy()
+    energies = [s.E for s in tsp.iter_anneal()]
+    # a threshold of 0 only accepts moves that do not raise the energy
+    assert energies == sorted(energies, reverse=True)
+    assert energies[-1] < E0
+
+    tsp = make_tsp(ThresholdAccepting(), 500.0, 1.0)
+    state, e = tsp.anneal()
+    assert e < E0
+    assert tsp.energy() == pytest.approx(e)
+
+
+def test_record_to_record():
+    # accepts states up to T above the record
+    assert RecordToRecord().threshold(10.0, 105.0, 100.0) == 5.0
+
+    tsp = make_tsp(RecordToRecord(), 500.0, 0.0)
+    E0 = tsp.energy()
+    for s in tsp.iter_anneal():
+        assert s.E <= s.best_energy + tsp.Tmax
+    assert tsp.best_energy < E0
+    assert tsp.energy() == pytest.approx(tsp.best_energy)
+
+
+def test_great_deluge():
+    # accepts states up to the water level T
+    assert GreatDeluge().threshold(110.0, 105.0, 100.0) == 5.0
+
+    tsp = make_tsp(GreatDeluge(), 0.0, 0.0)
+    E0 = tsp.energy()
+    tsp.Tmax, tsp.Tmin = E0, 0.5 * E0
+    state, e = tsp.anneal()
+    assert e <= 0.5 * E0
+    assert tsp.energy() == pytest.approx(e)
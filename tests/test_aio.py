@@ -0,0 +1,59 @@
+import asyncio
+import random
+
+import pytest
+
+from helper import cities, distance_matrix
+from simanneal.reporters import NullReporter
+from test_anneal import TravellingSalesmanProblem
+
+
+def make_tsp(steps):
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+    tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
+    tsp.copy_strategy = 'slice'
+    tsp.best_tracking = 'lazy'
+    tsp.steps = steps
+    tsp.reporter = NullReporter()
+    return tsp
+
+
+def test_anneal_async():
+    tsp = make_tsp(5000)
+    snapshots = []
+
+    async def watch():
+        # runs between the chunks of the anneal
+        while True:
+            await asyncio.sleep(0)
+            if tsp.best_state is not None:
+                snapshots.append((tsp.best_state[:], tsp.best_energy))
+
+    async def main():
+        watcher = asyncio.ensure_future(watch())
+        result = await tsp.anneal_async(chunk=100)
+        watcher.cancel()
+        return result
+
+    state, e = asyncio.run(main())
+    assert sorted(state) == sorted(cities)
+    assert e == pytest.approx(tsp.energy())
+    assert len(snapshots) >= 40
+    for best_state, best_energy in snapshots:
+        tsp.state = best_state
+        assert tsp.energy() == pytest.approx(best_energy)
+
+
+def test_anneal_async_timeout():
+    tsps = [make_tsp(10 ** 9) for _ in range(2)]
+
+    async def main():
+        tasks = [asyncio.wait_for(tsp.anneal_async(), 0.2) for tsp in tsps]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(main())
+    for tsp, result in zip(tsps, results):
+        assert isinstance(result, asyncio.TimeoutError)
+        assert sorted(tsp.state) == sorted(cities)
+        assert tsp.energy() == pytest.approx(tsp.best_energy)
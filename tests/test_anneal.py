@@ -1,9 +1,18 @@
+import math
+import os
+import pickle
 import random
+import signal
 import sys
+import threading
 import time
 
+import pytest
+
 from helper import distance, cities, distance_matrix
-from simanneal import Annealer
+from simanneal import Annealer, CancelToken
+from simanneal.cooling import AdaptiveCooling, PlateauCooling
+from simanneal.reporters import NullReporter
 
 if sys.version_info.major >= 3:  # pragma: no cover
     from io import StringIO
@@ -35,6 +44,23 @@ class TravellingSalesmanProblem(Annealer):
         return e
 
 
+class UndoTravellingSalesmanProblem(TravellingSalesmanProblem):
+    """Test annealer which reverts rejected moves with undo().
+    """
+
+    def move(self):
+        """Swaps two cities in the route and remembers them."""
+        a = random.randint(0, len(self.state) - 1)
+        b = random.randint(0, len(self.state) - 1)
+        self.state[a], self.state[b] = self.state[b], self.state[a]
+        self.last_move = (a, b)
+
+    def undo(self):
+        """Swaps the last two cities back."""
+        a, b = self.last_move
+        self.state[a], self.state[b] = self.state[b], self.state[a]
+
+
 def test_tsp_example():
     # initial state, a randomly-ordered itinerary
     init_state = list(cities.keys())
@@ -53,6 +79,294 @@ def test_tsp_example():
     assert len(state) == len(cities)
 
 
+def test_cooling_schedule():
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+
+    tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
+    tsp.copy_strategy = "slice"
+    tsp.steps = 10000
+    tsp.updates = 0
+    tsp.set_schedule({'tmax': 5000.0, 'tmin': 2.5, 'steps': 10000,
+                      'updates': 0, 'cooling': PlateauCooling(blocks=10)})
+
+    state, e = tsp.anneal()
+
+    assert sorted(state) == sorted(cities)
+    assert abs(tsp.energy() - e) < 1e-6
+
+
+def test_adaptive_cooling():
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+
+    tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
+    tsp.copy_strategy = "slice"
+    tsp.cooling = AdaptiveCooling()
+    tsp.steps = 10000
+    tsp.updates = 0
+    with pytest.raises(ValueError):
+        tsp.anneal()
+
+    temperatures = []
+    tsp.update = lambda step, T, E, acceptance, improvement: \
+        temperatures.append(T)
+    tsp.updates = 100
+    state, e = tsp.anneal()
+
+    assert sorted(state) == sorted(cities)
+    assert len(set(temperatures)) > 1
+    assert temperatures[-1] < tsp.Tmax
+
+
+def test_undo():
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+
+    tsp = UndoTravellingSalesmanProblem(distance_matrix,
+                                        initial_state=init_state)
+    tsp.copy_strategy = "slice"
+    tsp.steps = 10000
+    tsp.updates = 0
+
+    copies = []
+    copy_state = tsp.copy_state
+    tsp.copy_state = lambda state: copies.append(1) or copy_state(state)
+
+    state, e = tsp.anneal()
+
+    assert sorted(state) == sorted(cities)
+    assert tsp.energy() == e
+    # only the initial best, improvements and the final restore are copied
+    assert len(copies) < tsp.steps // 2
+
+
+def test_lazy_best_tracking():
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+
+    tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
+    tsp.copy_strategy = "slice"
+    tsp.best_tracking = "lazy"
+    tsp.steps = 10000
+    tsp.updates = 0
+
+    state, e = tsp.anneal()
+
+    assert sorted(state) == sorted(cities)
+    assert abs(tsp.energy() - e) < 1e-6
+    assert tsp.best_state == state
+
+
+def test_anneal_parallel():
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+
+    tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
+    tsp.copy_strategy = "slice"
+    tsp.steps = 2000
+    tsp.updates = 0
+
+    state, e, energies = tsp.anneal_parallel(4, workers=2, seed=42)
+
+    assert len(energies) == 4
+    assert e == min(energies)
+    assert sorted(state) == sorted(cities)
+    assert abs(tsp.energy() - e) < 1e-6
+
+    # the same seed reproduces the same runs
+    tsp.state = init_state[:]
+    assert tsp.anneal_parallel(4, workers=2, seed=42)[2] == energies
+
+
+class RecordingRandom(random.Random):
+    """Random number generator recording the uniforms it draws."""
+
+    def random(self):
+        x = super(RecordingRandom, self).random()
+        self.drawn.append(x)
+        return x
+
+
+def test_worker_seeds_are_independent():
+    from simanneal.anneal import _anneal_run
+
+    class Walk(Annealer):
+        # moves draw from the random module
+        def move(self):
+            x = random.random()
+            self.proposed.append(x)
+            self.state += x - 0.5
+
+        def energy(self):
+            return abs(self.state)
+
+    walk = Walk(0.0)
+    walk.random = RecordingRandom()
+    walk.random.drawn = []
+    walk.proposed = []
+    walk.steps = 200
+    walk.updates = 0
+    handler = signal.getsignal(signal.SIGINT)
+    try:
+        _anneal_run((walk, 42))
+    finally:
+        signal.signal(signal.SIGINT, handler)
+
+    assert len(walk.proposed) == 200
+    assert walk.random.drawn
+    assert not set(walk.proposed) & set(walk.random.drawn)
+
+
+def test_temper():
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+
+    tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
+    tsp.copy_strategy = "slice"
+    tsp.Tmax = 5000.0
+    tsp.steps = 3000
+    tsp.updates = 0
+
+    state, e = tsp.temper(replicas=3, exchanges=30, seed=42)
+
+    assert sorted(state) == sorted(cities)
+    assert abs(tsp.energy() - e) < 1e-6
+
+    tsp.cooling = AdaptiveCooling()
+    with pytest.raises(ValueError):
+        tsp.temper(replicas=3, exchanges=30, seed=42)
+
+
+def test_target_energy():
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+
+    tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
+    tsp.copy_strategy = "slice"
+    tsp.updates = 0
+    tsp.target_energy = 15000.0
+
+    steps = []
+    energy = tsp.energy
+    tsp.energy = lambda: steps.append(1) or energy()
+    state, e = tsp.anneal()
+
+    assert e <= 15000.0
+    assert len(steps) < tsp.steps
+
+
+def test_stagnation_limit():
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+
+    tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
+    tsp.copy_strategy = "slice"
+    tsp.Tmax = tsp.Tmin = 0.001  # a greedy descent, which soon stalls
+    tsp.updates = 0
+    tsp.stagnation_limit = 500
+
+    steps = []
+    energy = tsp.energy
+    tsp.energy = lambda: steps.append(1) or energy()
+    state, e = tsp.anneal()
+
+    assert sorted(state) == sorted(cities)
+    assert len(steps) < tsp.steps
+
+
+def test_time_limit():
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+
+    tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
+    tsp.copy_strategy = "slice"
+    tsp.steps = 10
+    tsp.time_limit = 0.2
+    temperatures = []
+    tsp.update = lambda step, T, E, acceptance, improvement: \
+        temperatures.append(T)
+
+    started = time.time()
+    state, e = tsp.anneal()
+    elapsed = time.time() - started
+
+    # the time limit replaces the step budget
+    assert 0.2 <= elapsed < 1.0
+    assert len(temperatures) > 50
+    assert temperatures[-1] < temperatures[0]
+
+
+def test_instrument():
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+
+    tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
+    tsp.copy_strategy = "slice"
+    tsp.steps = 2000
+    tsp.updates = 0
+    tsp.anneal()
+    assert tsp.stats is None
+
+    tsp.instrument = True
+    tsp.anneal()
+    stats = tsp.stats
+    assert stats.steps == 2000
+    assert stats.calls['move'] == 2000
+    # move returns None, so energy is evaluated after every move
+    assert stats.calls['energy'] == 2001
+    assert stats.calls['copy_prev'] + stats.calls['copy_restore'] == 2002
+    assert 1 <= stats.calls['copy_best'] <= 2001
+    assert 0 < stats.calls['accept'] < 2000
+    assert 0 < sum(stats.ns.values()) < stats.total_ns
+    assert 'overhead' in str(stats)
+
+    undo = UndoTravellingSalesmanProblem(distance_matrix,
+                                         initial_state=init_state)
+    undo.copy_strategy = "slice"
+    undo.steps = 2000
+    undo.updates = 0
+    undo.instrument = True
+    undo.anneal()
+    assert undo.stats.calls['copy_prev'] == 0
+    assert undo.stats.calls['copy_restore'] == 1
+
+
+@pytest.mark.parametrize('best_tracking', ['eager', 'lazy'])
+def test_buffer_copy_strategy(best_tracking):
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+
+    tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
+    tsp.copy_strategy = "buffer"
+    tsp.best_tracking = best_tracking
+    tsp.steps = 5000
+    tsp.updates = 10
+    tsp.reporter = NullReporter()
+    state = tsp.state
+
+    best_state, e = tsp.anneal()
+
+    # rejected moves and the final best state are restored in place
+    assert tsp.state is state
+    assert tsp.state == best_state
+    assert sorted(best_state) == sorted(cities)
+    assert abs(tsp.energy() - e) < 1e-6
+
+
+def test_copy_into():
+    tsp = TravellingSalesmanProblem(distance_matrix,
+                                    initial_state=list(cities.keys()))
+    target = [None] * len(cities)
+    for strategy in ('deepcopy', 'slice'):
+        tsp.copy_strategy = strategy
+        copied = tsp.copy_into(tsp.state, target)
+        assert copied == tsp.state and copied is not target
+    tsp.copy_strategy = 'buffer'
+    assert tsp.copy_into(tsp.state, target) is target
+    assert target == tsp.state
+
+
 def test_auto():
     # initial state, a randomly-ordered itinerary
     init_state = list(cities.keys())
@@ -72,6 +386,77 @@ def test_auto():
     assert tsp.updates == auto_schedule['updates']
 
 
+class RandomWalk(Annealer):
+    """Test annealer whose state is its energy, moved by random steps,
+    which records the energy change of every move.
+    """
+
+    steps_up = (1.0, 5.0, 20.0)
+    steps_down = (-1.0, -5.0, -20.0)
+
+    def move(self):
+        dE = self.random.choice(self.steps_up + self.steps_down)
+        self.state += dE
+        self.sampled.append(dE)
+        return dE
+
+    def energy(self):
+        return self.state
+
+
+def test_auto_acceptance():
+    walk = RandomWalk(0.0, seed=1)
+    walk.reporter = NullReporter()
+    walk.sampled = []
+    schedule = walk.auto(minutes=0.01, steps=1000)
+
+    assert len(walk.sampled) == 1000
+    assert 0 < schedule['tmin'] <= schedule['tmax']
+
+    # 98% of the sampled moves are accepted at Tmax, up to its rounding
+    acceptance = sum(1.0 if dE <= 0.0 else math.exp(-dE / schedule['tmax'])
+                     for dE in walk.sampled) / len(walk.sampled)
+    assert acceptance == pytest.approx(0.98, abs=0.005)
+
+
+def test_auto_restores_state():
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+    tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
+    tsp.copy_strategy = "slice"
+    tsp.reporter = NullReporter()
+    E = tsp.energy()
+
+    schedule = tsp.auto(minutes=0.01, steps=500)
+
+    assert schedule['tmin'] <= schedule['tmax']
+    assert tsp.state == init_state
+    assert tsp.energy() == E
+
+
+def test_auto_without_uphill_moves():
+    walk = RandomWalk(0.0, seed=1)
+    walk.reporter = NullReporter()
+    walk.sampled = []
+    walk.steps_up = ()
+    with pytest.raises(RuntimeError, match='No moves that increase'):
+        walk.auto(minutes=0.01, steps=100)
+
+
+def test_auto_instrument():
+    walk = RandomWalk(0.0, seed=1)
+    walk.reporter = NullReporter()
+    walk.sampled = []
+    walk.instrument = True
+    walk.auto(minutes=0.01, steps=300)
+
+    stats = walk.stats
+    assert stats.steps == 300
+    assert stats.calls['move'] == 300
+    assert stats.calls['energy'] == 1
+    assert 0 < sum(stats.ns.values()) < stats.total_ns
+
+
 def test_save_load_state(tmpdir):
     # initial state, a randomly-ordered itinerary
     init_state = list(cities.keys())
@@ -106,16 +491,16 @@ def test_load_state_init(tmpdir):
     assert tsp.state == tsp2.state
 
 
-def test_default_update_formatting():
+def test_default_update_formatting(monkeypatch):
     init_state = list(cities.keys())
     tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
 
     # fix the start time and patch time.time() to give predictable Elapsed and Remaining times
     tsp.start = 1.0
-    time.time = lambda: 9.0
+    monkeypatch.setattr(time, 'time', lambda: 9.0)
 
     # for step=0, the output should be column headers followed by partial data
-    sys.stderr = StringIO()
+    monkeypatch.setattr(sys, 'stderr', StringIO())
     tsp.default_update(0, 1, 2, 3, 4)
     output = sys.stderr.getvalue().split('\n')
     assert 3 == len(output)
@@ -123,8 +508,407 @@ def test_default_update_formatting():
     assert '\r     1.00000          2.00                         0:00:08            ' == output[2]
 
     # when step>0, default_update should use \r to overwrite the previous data
-    sys.stderr = StringIO()
+    monkeypatch.setattr(sys, 'stderr', StringIO())
     tsp.default_update(10, 1, 2, 3, 4)
     output = sys.stderr.getvalue().split('\n')
     assert 1 == len(output)
     assert '\r     1.00000          2.00   300.00%   400.00%     0:00:08    11:06:32' == output[0]
+
+
+def test_iter_anneal():
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+
+    tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
+    tsp.copy_strategy = "slice"
+    tsp.steps = 10000
+    tsp.updates = 10
+    tsp.update = None  # never called by iter_anneal
+
+    run = tsp.iter_anneal()
+    with pytest.raises(RuntimeError):
+        run.result
+    snapshots = list(run)
+
+    assert [s.step for s in snapshots] == list(range(0, 10001, 1000))
+    assert snapshots[0].acceptance is None
+    assert all(0.0 <= s.acceptance <= 1.0 for s in snapshots[1:])
+    assert all(s.best_energy <= s.E for s in snapshots)
+    elapsed = [s.elapsed for s in snapshots]
+    assert elapsed == sorted(elapsed)
+    state, e = run.result
+    assert e == snapshots[-1].best_energy == tsp.best_energy
+    assert sorted(state) == sorted(cities)
+    assert tsp.energy() == pytest.approx(e)
+
+
+def test_iter_anneal_close():
+    tsps = []
+    for _ in range(2):
+        init_state = list(cities.keys())
+        random.shuffle(init_state)
+        tsp = TravellingSalesmanProblem(distance_matrix,
+                                        initial_state=init_state)
+        tsp.steps = 100000
+        tsp.updates = 100
+        tsps.append(tsp)
+
+    # interleave two runs in one thread, stopping both after a few updates
+    runs = [tsp.iter_anneal() for tsp in tsps]
+    for _ in range(5):
+        for run in runs:
+            snapshot = next(run)
+    for run in runs:
+        run.close()
+        state, e = run.result
+        assert e == run.annealer.best_energy
+        assert run.annealer.energy() == pytest.approx(e)
+    assert snapshot.step == 4000
+
+    # a run closed before it started has no result
+    run = tsps[0].iter_anneal()
+    run.close()
+    with pytest.raises(RuntimeError):
+        run.result
+
+
+def test_no_sigint_handler_by_default():
+    handler = signal.getsignal(signal.SIGINT)
+    init_state = list(cities.keys())
+
+    # constructing annealers off the main thread works
+    tsps = []
+    thread = threading.Thread(target=lambda: tsps.append(
+        TravellingSalesmanProblem(distance_matrix, initial_state=init_state)))
+    thread.start()
+    thread.join()
+    assert len(tsps) == 1
+    assert signal.getsignal(signal.SIGINT) is handler
+
+
+def test_handle_sigint():
+    handler = signal.getsignal(signal.SIGINT)
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+    tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
+    tsp.steps = 10000
+    tsp.updates = 10
+    steps = []
+
+    def update(step, T, E, acceptance, improvement):
+        steps.append(step)
+        if step == 3000:
+            os.kill(os.getpid(), signal.SIGINT)
+    tsp.update = update
+
+    state, e = tsp.anneal(handle_sigint=True)
+    assert tsp.user_exit
+    assert steps[-1] < 4000
+    assert sorted(state) == sorted(cities)
+    assert signal.getsignal(signal.SIGINT) is handler
+
+
+def test_cancel_token():
+    token = CancelToken()
+    tsps = []
+    for _ in range(2):
+        init_state = list(cities.keys())
+        random.shuffle(init_state)
+        tsp = TravellingSalesmanProblem(distance_matrix,
+                                        initial_state=init_state)
+        tsp.steps = 10 ** 9
+        tsp.updates = 0
+        tsp.cancel_token = token
+        tsps.append(tsp)
+
+    results = []
+    threads = [threading.Thread(target=lambda tsp=tsp: results.append(
+        tsp.anneal())) for tsp in tsps]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    token.cancel()
+    for thread in threads:
+        thread.join(5)
+        assert not thread.is_alive()
+
+    assert len(results) == 2
+    for tsp in tsps:
+        # the flag is lowered again once the run has stopped
+        assert not tsp.user_exit
+        assert tsp.energy() == pytest.approx(tsp.best_energy)
+
+    # a cancelled token stops new runs at once, until reset
+    tsp = tsps[0]
+    tsp.instrument = True
+    tsp.anneal()
+    assert tsp.stats.steps == 0
+    token.reset()
+    tsp.steps = 1000
+    tsp.anneal()
+    assert tsp.stats.steps == 1000
+
+
+def test_cancel_token_keeps_sigint():
+    tsp = TravellingSalesmanProblem(distance_matrix,
+                                    initial_state=sorted(cities))
+    tsp.steps = 10 ** 9
+    tsp.updates = 10 ** 6
+    token = tsp.cancel_token = CancelToken()
+
+    # SIGINT after the token: the interrupt survives the end of the run
+    run = tsp.iter_anneal()
+    next(run)
+    token.cancel()
+    tsp.set_user_exit(signal.SIGINT, None)
+    list(run)
+    assert tsp.user_exit
+
+    # SIGINT before the token: the token leaves the flag alone
+    tsp.user_exit = False
+    token.reset()
+    run = tsp.iter_anneal()
+    next(run)
+    tsp.set_user_exit(signal.SIGINT, None)
+    token.cancel()
+    run.close()
+    assert tsp.user_exit
+
+
+def test_cancel_token_pickle():
+    token = CancelToken()
+    token.cancel()
+    copy = pickle.loads(pickle.dumps(token))
+    assert not copy.cancelled
+
+
+@pytest.mark.parametrize('best_tracking', ['eager', 'lazy'])
+def test_checkpoint_resume(tmpdir, best_tracking):
+    path = str(tmpdir.join('run.checkpoint'))
+    init_state = sorted(cities.keys())
+
+    def make_tsp():
+        tsp = TravellingSalesmanProblem(distance_matrix,
+                                        initial_state=init_state)
+        tsp.copy_strategy = 'slice'
+        tsp.best_tracking = best_tracking
+        tsp.cooling = AdaptiveCooling()
+        tsp.steps = 10000
+        tsp.updates = 20
+        tsp.reporter = NullReporter()
+        tsp.checkpoint_path = path
+        tsp.checkpoint_steps = 4000
+        tsp.seed = 42
+        return tsp
+
+    # an uninterrupted run
+    random.seed(42)
+    expected = make_tsp().anneal()
+
+    # a run interrupted after its first checkpoint
+    tsp = make_tsp()
+
+    def update(step, T, E, acceptance, improvement):
+        if step == 6000:
+            tsp.user_exit = True
+    tsp.update = update
+    random.seed(42)
+    tsp.anneal()
+    assert tsp.load_checkpoint(path)['step'] == 4000
+    assert [p.basename for p in tmpdir.listdir()] == ['run.checkpoint']
+
+    # resumes on a fresh annealer
+    random.seed(0)
+    tsp = make_tsp()
+    tsp.instrument = True
+    assert tsp.anneal(resume_from=path) == expected
+    assert tsp.stats.steps == 10000
+    assert tsp.stats.calls['move'] == 6000
+
+
+def test_checkpoint_seconds(tmpdir):
+    path = str(tmpdir.join('run.checkpoint'))
+    init_state = list(cities.keys())
+    tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
+    tsp.steps = 10 ** 9
+    tsp.time_limit = 0.3
+    tsp.updates = 0
+    tsp.checkpoint_path = path
+    tsp.checkpoint_seconds = 0.05
+    tsp.anneal()
+    checkpoint = tsp.load_checkpoint(path)
+    assert checkpoint['elapsed'] > 0.1
+    assert checkpoint['best_energy'] >= tsp.best_energy
+
+
+def test_checkpoint_seconds_keeps_lazy_copies(tmpdir):
+    def copies(checkpoint_seconds):
+        random.seed(3)
+        tsp = TravellingSalesmanProblem(distance_matrix,
+                                        initial_state=sorted(cities))
+        tsp.copy_strategy = 'slice'
+        tsp.best_tracking = 'lazy'
+        tsp.seed = 3
+        tsp.steps = 5000
+        tsp.updates = 0
+        tsp.instrument = True
+        tsp.checkpoint_path = str(tmpdir.join('run.checkpoint'))
+        tsp.checkpoint_seconds = checkpoint_seconds
+        tsp.anneal()
+        return tsp.stats.calls['copy_best']
+
+    # polling the clock for checkpoints that are not due copies nothing
+    assert copies(3600.0) == copies(None)
+
+
+@pytest.mark.parametrize('random_block', [None, 1000])
+def test_seed(random_block):
+    from simanneal.permutation import PermutationAnnealer
+
+    def make_tsp(seed):
+        tsp = PermutationAnnealer(distance_matrix,
+                                  initial_state=sorted(cities), seed=seed)
+        tsp.steps = 5000
+        tsp.updates = 0
+        tsp.random_block = random_block
+        return tsp
+
+    # interleaved runs with the same seed do not disturb each other
+    a, b = make_tsp(7), make_tsp(7)
+    runs = [a.iter_anneal(chunk=100), b.iter_anneal(chunk=100)]
+    for _ in zip(*runs):
+        random.random()
+    for run in runs:
+        list(run)
+    assert a.state == b.state
+    assert a.best_energy == b.best_energy
+
+    # the seed attribute reseeds every run
+    a.state = sorted(cities)
+    assert a.anneal() == (b.state, b.best_energy)
+    c = make_tsp(None)
+    c.seed = 7
+    assert c.anneal() == (b.state, b.best_energy)
+
+
+class BoundedTravellingSalesmanProblem(UndoTravellingSalesmanProblem):
+    """Test annealer which stops evaluating moves above the threshold.
+    """
+
+    thresholds = None
+
+    def bounded_move(self, threshold):
+        """Swaps two cities, summing the change edge by edge."""
+        self.thresholds.append(threshold)
+        a = random.randint(0, len(self.state) - 1)
+        b = random.randint(0, len(self.state) - 1)
+        before = self.energy()
+        self.state[a], self.state[b] = self.state[b], self.state[a]
+        self.last_move = (a, b)
+        d, state = self.distance_matrix, self.state
+        dE = -before
+        for i in range(len(state)):
+            dE += d[state[i - 1]][state[i]]
+            if dE > threshold:
+                self.aborted += 1
+                return dE
+        return dE
+
+
+def test_bounded_move():
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+
+    tsp = BoundedTravellingSalesmanProblem(distance_matrix,
+                                           initial_state=init_state)
+    tsp.steps = 5000
+    tsp.updates = 0
+    tsp.thresholds = []
+    tsp.aborted = 0
+    tsp.instrument = True
+    state, e = tsp.anneal()
+
+    assert tsp.stats.calls['move'] == 5000
+    assert len(tsp.thresholds) == 5000
+    assert all(threshold >= 0.0 for threshold in tsp.thresholds)
+    assert 0 < tsp.aborted < 5000
+    assert sorted(state) == sorted(cities)
+    assert tsp.energy() == pytest.approx(e)
+
+    # nothing above the threshold is ever accepted
+    tsp.bounded_move = lambda threshold: threshold + 1.0
+    tsp.undo = lambda: None
+    new_state, new_e = tsp.anneal()
+    assert new_state == state
+    assert new_e == pytest.approx(e)
+
+
+def test_reheat():
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+
+    tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
+    tsp.copy_strategy = 'slice'
+    tsp.Tmax, tsp.Tmin = 2500.0, 0.1
+    tsp.steps = 20000
+    tsp.reheat = 0.1
+    tsp.updates = 0
+    with pytest.raises(ValueError):
+        tsp.anneal()
+
+    tsp.updates = 100
+    temperatures = []
+    tsp.update = lambda step, T, E, acceptance, improvement: \
+        temperatures.append(T)
+    state, e = tsp.anneal()
+
+    assert tsp.reheats > 0
+    rises = sum(1 for a, b in zip(temperatures, temperatures[1:]) if b > a)
+    # a reheat in the last window shows no rise at the final update
+    assert 0 < rises <= tsp.reheats
+    assert max(temperatures[1:]) <= tsp.Tmax
+    assert temperatures[-1] == pytest.approx(tsp.Tmin)
+    assert sorted(state) == sorted(cities)
+    assert tsp.energy() == pytest.approx(e)
+
+
+@pytest.mark.parametrize('checkpoint_step', [4000, 10000, 16000])
+def test_reheat_resume(tmpdir, checkpoint_step):
+    path = str(tmpdir.join('run.checkpoint'))
+
+    def make_tsp():
+        tsp = TravellingSalesmanProblem(distance_matrix,
+                                        initial_state=sorted(cities))
+        tsp.copy_strategy = 'slice'
+        tsp.Tmax, tsp.Tmin = 2500.0, 0.1
+        tsp.steps = 20000
+        tsp.updates = 100
+        tsp.reheat = 0.1
+        tsp.reporter = NullReporter()
+        tsp.seed = 1
+        return tsp
+
+    # an uninterrupted run
+    random.seed(1)
+    tsp = make_tsp()
+    expected = tsp.anneal()
+    reheats = tsp.reheats
+    assert reheats > 0
+
+    # a run interrupted after its checkpoint, taken while stagnating
+    # before the first reheat, or after some reheats
+    tsp = make_tsp()
+    tsp.checkpoint_path = path
+    tsp.checkpoint_steps = checkpoint_step
+
+    def update(step, T, E, acceptance, improvement):
+        if step >= checkpoint_step:
+            tsp.user_exit = True
+    tsp.update = update
+    random.seed(1)
+    tsp.anneal()
+
+    random.seed(0)
+    tsp = make_tsp()
+    assert tsp.anneal(resume_from=path) == expected
+    assert tsp.reheats == reheats
@@ -0,0 +1,161 @@
+import random
+
+import pytest
+
+from simanneal import Annealer
+
+np = pytest.importorskip('numpy')
+
+
+class IsingChain(Annealer):
+    """Test annealer with a batch mode: a closed Ising chain with random
+    couplings, E = -sum(J[i] * s[i] * s[i + 1]).
+    """
+
+    def __init__(self, n, seed=0):
+        rng = np.random.RandomState(seed)
+        self.J = rng.choice([-1.0, 1.0], size=n)
+        self.rng = rng
+        super(IsingChain, self).__init__(
+            initial_state=rng.choice([-1, 1], size=n))
+
+    def energy(self):
+        s = self.state
+        return -float(np.sum(self.J * s * np.roll(s, -1)))
+
+    def move(self):
+        raise AssertionError('move is not used in batch mode')
+
+    def propose_batch(self, size):
+        """Proposes single spin flips."""
+        s, J = self.state, self.J
+        i = self.rng.randint(len(s), size=size)
+        field = J[i] * s[(i + 1) % len(s)] + J[i - 1] * s[i - 1]
+        return i, 2.0 * s[i] * field
+
+    def apply_batch(self, moves, accepted):
+        """Flips accepted spins unless a neighbour was already flipped."""
+        n = len(self.state)
+        touched = set()
+        applied = []
+        for k in accepted:
+            i = int(moves[k])
+            if {i, (i - 1) % n, (i + 1) % n} & touched:
+                continue
+            touched.add(i)
+            self.state[i] = -self.state[i]
+            applied.append(k)
+        return applied
+
+
+def test_batch_anneal():
+    random.seed(0)
+    chain = IsingChain(200)
+    chain.copy_strategy = "method"
+    chain.batch_size = 64
+    chain.Tmax = 10.0
+    chain.Tmin = 0.01
+    chain.steps = 20000
+    chain.updates = 10
+    updates = []
+    chain.update = lambda step, T, E, acceptance, improvement: \
+        updates.append((step, E))
+
+    state, e = chain.anneal()
+
+    assert e == pytest.approx(chain.energy())
+    # the ground state satisfies all but possibly one coupling
+    assert e <= -200 + 2 + 20
+    # updates fall on block boundaries
+    assert len(updates) == 11
+    assert updates[-1][0] == 20000
+    assert updates[-1][1] >= e
+
+
+def test_batch_target_energy():
+    random.seed(1)
+    chain = IsingChain(100)
+    chain.copy_strategy = "method"
+    chain.batch_size = 32
+    chain.updates = 0
+    chain.Tmax = 5.0
+    chain.Tmin = 0.01
+    chain.target_energy = -50.0
+
+    state, e = chain.anneal()
+
+    assert e <= -50.0
+    assert e == pytest.approx(chain.energy())
+
+
+class IsingChainMoves(IsingChain):
+    """The Ising chain with one move at a time."""
+
+    def move(self):
+        s, J = self.state, self.J
+        i = int(self.rng.randint(len(s)))
+        dE = 2.0 * s[i] * (J[i] * s[(i + 1) % len(s)] + J[i - 1] * s[i - 1])
+        s[i] = -s[i]
+        return dE
+
+
+def test_numpy_copy_strategy():
+    random.seed(2)
+    chain = IsingChainMoves(100)
+    chain.copy_strategy = "numpy"
+    chain.Tmax = 5.0
+    chain.Tmin = 0.01
+    chain.steps = 5000
+    chain.updates = 0
+    state = chain.state
+
+    best_state, e = chain.anneal()
+
+    assert chain.state is state
+    assert np.array_equal(chain.state, best_state)
+    assert e == pytest.approx(chain.energy())
+
+    target = np.zeros_like(state)
+    assert chain.copy_into(state, target) is target
+    assert np.array_equal(target, state)
+
+
+def test_batch_requires_hooks():
+    chain = IsingChainMoves(10)
+    chain.apply_batch = None
+    chain.batch_size = 4
+    with pytest.raises(NotImplementedError, match='apply_batch'):
+        chain.anneal()
+
+
+def test_batch_rejects_reheat():
+    chain = IsingChain(10)
+    chain.batch_size = 4
+    chain.reheat = 0.1
+    with pytest.raises(ValueError):
+        chain.anneal()
+
+
+def test_without_default_rng(monkeypatch):
+    # NumPy before 1.17, as on Python 2, only has RandomState
+    monkeypatch.delattr(np.random, 'default_rng', raising=False)
+    chain = IsingChain(50)
+    chain.copy_strategy = "method"
+    chain.batch_size = 16
+    chain.steps = 2000
+    chain.updates = 0
+    chain.Tmax = 5.0
+    chain.Tmin = 0.01
+    chain.seed = 1
+    state, e = chain.anneal()
+    assert e == pytest.approx(chain.energy())
+
+    chain = IsingChainMoves(50)
+    chain.copy_strategy = "method"
+    chain.random_block = 100
+    chain.steps = 2000
+    chain.updates = 0
+    chain.Tmax = 5.0
+    chain.Tmin = 0.01
+    state, e = chain.anneal()
+    assert e == pytest.approx(chain.energy())
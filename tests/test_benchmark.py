@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from simanneal import benchmark
+
+
+@pytest.mark.parametrize('problem', sorted(benchmark.PROBLEMS))
+def test_run_benchmark(problem):
+    result = benchmark.run_benchmark(problem, 25, 'slice', 500)
+    assert result['problem'] == problem
+    assert result['steps_per_second'] > 0
+    assert 0.0 <= result['copy_share'] < 1.0
+    assert result['trace'][0][1] == 0
+    assert result['trace'][-1][1] == 500
+    assert result['trace'][-1][2] == result['best_energy']
+    # the phase shares come from a separate instrumented run
+    assert result['stats']['steps'] == 500
+
+
+def test_delta_moves_are_exact():
+    for problem in ('tsp', 'ising'):
+        annealer = benchmark.PROBLEMS[problem][0](36, benchmark.random.Random(1))
+        E = annealer.energy()
+        for _ in range(200):
+            E += annealer.move()
+            assert E == pytest.approx(annealer.energy())
+
+
+def test_main(tmpdir, capsys):
+    output = str(tmpdir.join('results.json'))
+    benchmark.main(['--problem', 'tsp', '--size', '20', '--steps', '200',
+                    '--output', output])
+    with open(output) as fh:
+        results = json.load(fh)
+    assert [r['copy_strategy'] for r in results['results']] == \
+        benchmark.COPY_STRATEGIES
+    assert 'steps/s' in capsys.readouterr().err
@@ -0,0 +1,59 @@
+import pytest
+
+from simanneal.cooling import (
+    AdaptiveCooling, ExponentialCooling, LinearCooling, LogarithmicCooling, LundyMeesCooling,
+    PlateauCooling, TableCooling, lam_acceptance)
+
+
+@pytest.mark.parametrize('cooling', [
+    ExponentialCooling(),
+    LinearCooling(),
+    LogarithmicCooling(),
+    LundyMeesCooling(),
+    TableCooling(),
+    PlateauCooling(),
+    TableCooling(size=100, cooling=LinearCooling()),
+])
+def test_cooling_range(cooling):
+    cooling.setup(25000.0, 2.5)
+    temps = [cooling.temperature(i / 1000.0) for i in range(1001)]
+    assert temps[0] == pytest.approx(25000.0)
+    assert temps[-1] == pytest.approx(2.5)
+    assert all(a >= b for a, b in zip(temps, temps[1:]))
+
+
+def test_plateau_cooling():
+    cooling = PlateauCooling(blocks=4)
+    cooling.setup(1000.0, 1.0)
+    temps = [cooling.temperature(i / 100.0) for i in range(101)]
+    assert sorted(set(temps)) == pytest.approx([1.0, 10.0, 100.0, 1000.0])
+    assert temps[:25] == [1000.0] * 25
+
+
+@pytest.mark.parametrize('cooling', [
+    ExponentialCooling(), LogarithmicCooling(), LundyMeesCooling()])
+def test_cooling_requires_positive_tmin(cooling):
+    with pytest.raises(Exception):
+        cooling.setup(25000.0, 0.0)
+
+
+def test_lam_acceptance():
+    assert lam_acceptance(0.0) == pytest.approx(1.0)
+    assert lam_acceptance(0.15) == pytest.approx(0.44)
+    assert lam_acceptance(0.5) == pytest.approx(0.44)
+    assert lam_acceptance(1.0) == pytest.approx(0.001)
+
+
+def test_adaptive_cooling():
+    cooling = AdaptiveCooling(target=lambda fraction: 0.5)
+    cooling.setup(100.0, 1.0)
+    assert cooling.temperature(0.0) == 100.0
+
+    # too many moves accepted, cool down
+    cooling.feedback(0.1, 0.9, 0.2)
+    assert cooling.temperature(0.1) < 100.0
+
+    # too few moves accepted, heat up
+    T = cooling.temperature(0.1)
+    cooling.feedback(0.2, 0.1, 0.0)
+    assert cooling.temperature(0.2) > T
@@ -0,0 +1,87 @@
+import pickle
+import random
+
+import pytest
+
+from helper import cities, distance_matrix
+from simanneal.permutation import PermutationAnnealer
+
+np = pytest.importorskip('numpy')
+
+from simanneal.distance import DistanceMatrix  # noqa: E402
+
+
+def test_from_coordinates_matches_great_circle():
+    matrix = DistanceMatrix.from_coordinates(cities, block=7)
+    assert len(matrix) == len(cities)
+    assert matrix.array.dtype == np.float64
+    assert matrix.array.flags['C_CONTIGUOUS']
+    for a in cities:
+        for b in cities:
+            i, j = matrix.indices([a, b])
+            assert matrix[i][j] == pytest.approx(distance_matrix[a][b],
+                                                 abs=1e-6)
+
+
+def test_from_dict_and_labels():
+    matrix = DistanceMatrix.from_dict(distance_matrix)
+    tour = list(cities)
+    random.shuffle(tour)
+    indices = matrix.indices(tour)
+    assert matrix.labels_of(indices) == tour
+    expected = sum(distance_matrix[tour[i - 1]][tour[i]]
+                   for i in range(len(tour)))
+    assert matrix.tour_length(indices) == pytest.approx(expected)
+
+
+def test_distance():
+    matrix = DistanceMatrix([[0.0, 1.5], [2.5, 0.0]])
+    assert matrix.distance(0, 1) == 1.5
+    assert matrix.distance(1, 0) == 2.5
+    assert type(matrix.distance(0, 1)) is float
+    assert type(pickle.loads(pickle.dumps(matrix)).distance(1, 0)) is float
+
+
+def test_bad_shape():
+    with pytest.raises(ValueError):
+        DistanceMatrix(np.zeros((2, 3)))
+    with pytest.raises(ValueError):
+        DistanceMatrix(np.zeros((2, 2)), labels=['a'])
+
+
+def test_memory_mapped(tmpdir):
+    path = str(tmpdir.join('distances.npy'))
+    matrix = DistanceMatrix.from_coordinates(cities, path=path)
+    assert isinstance(matrix.array, np.memmap)
+    assert not matrix.array.flags['WRITEABLE']
+
+    # pickles by path, not by value
+    data = pickle.dumps(matrix)
+    assert len(data) < matrix.array.nbytes
+    copy = pickle.loads(data)
+    assert copy.labels == matrix.labels
+    assert np.array_equal(copy.array, matrix.array)
+
+    loaded = DistanceMatrix.load(path, labels=matrix.labels)
+    assert np.array_equal(loaded.array, matrix.array)
+    assert loaded.index == matrix.index
+
+
+def test_permutation_anneal():
+    matrix = DistanceMatrix.from_coordinates(cities)
+    state = list(range(len(matrix)))
+    random.shuffle(state)
+    tsp = PermutationAnnealer(matrix, initial_state=state)
+    tsp.steps = 5000
+    tsp.updates = 0
+    E = tsp.energy()
+    for _ in range(200):
+        dE = tsp.move()
+        assert type(dE) is float
+        E += dE
+    assert E == pytest.approx(tsp.energy())
+    assert type(E) is float
+
+    state, e = tsp.anneal()
+    assert sorted(state) == list(range(len(matrix)))
+    assert e == pytest.approx(matrix.tour_length(state))
@@ -0,0 +1,79 @@
+import multiprocessing
+import random
+
+import pytest
+
+from helper import cities, distance_matrix
+from simanneal.cooling import AdaptiveCooling
+from simanneal.distributed import Coordinator, run_worker
+from simanneal.permutation import PermutationAnnealer
+from simanneal.reporters import NullReporter
+
+
+class FailingAnnealer(PermutationAnnealer):
+    """Test annealer whose moves fail."""
+
+    def move(self):
+        raise ValueError('no moves today')
+
+
+def test_distributed():
+    init_state = sorted(cities)
+    random.Random(0).shuffle(init_state)
+    tsp = PermutationAnnealer(distance_matrix, initial_state=init_state)
+    tsp.steps = 4000
+    # workers keep the updates, which reheating relies on
+    tsp.reheat = 0.1
+    tsp.reporter = NullReporter()
+    E0 = tsp.energy()
+
+    with Coordinator(tsp, address=('127.0.0.1', 0), authkey=b'test',
+                     rounds=4, timeout=60) as coordinator:
+        workers = [multiprocessing.Process(
+            target=run_worker, args=(coordinator.address, b'test'))
+            for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        state, e, energies = coordinator.run(6, seed=42)
+
+    for worker in workers:
+        worker.join(10)
+        assert worker.exitcode == 0
+
+    assert len(energies) == 6
+    assert e == min(energies)
+    assert e < E0
+    assert sorted(state) == sorted(cities)
+    assert tsp.state == state
+    assert tsp.energy() == pytest.approx(e)
+
+
+def test_wrong_authkey():
+    tsp = PermutationAnnealer(distance_matrix, initial_state=sorted(cities))
+    with Coordinator(tsp, address=('127.0.0.1', 0),
+                     authkey=b'right') as coordinator:
+        with pytest.raises(multiprocessing.AuthenticationError):
+            run_worker(coordinator.address, b'wrong')
+
+
+def test_adaptive_cooling_rejected():
+    tsp = PermutationAnnealer(distance_matrix, initial_state=sorted(cities))
+    tsp.cooling = AdaptiveCooling()
+    coordinator = Coordinator(tsp, address=('127.0.0.1', 0))
+    with pytest.raises(ValueError):
+        coordinator.run(2)
+    assert coordinator.job is None
+
+
+def test_failing_worker():
+    tsp = FailingAnnealer(distance_matrix, initial_state=sorted(cities))
+    tsp.steps = 100
+    with Coordinator(tsp, address=('127.0.0.1', 0), authkey=b'test',
+                     rounds=2) as coordinator:
+        worker = multiprocessing.Process(
+            target=run_worker, args=(coordinator.address, b'test'))
+        worker.start()
+        with pytest.raises(RuntimeError, match='no moves today'):
+            coordinator.run(2, seed=1)
+    worker.join(10)
+    assert worker.exitcode == 0
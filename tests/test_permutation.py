@@ -0,0 +1,104 @@
+import math
+import pickle
+import random
+
+import pytest
+
+from helper import cities, distance_matrix
+from simanneal.permutation import PermutationAnnealer
+
+
+def random_matrix(n, symmetric=True):
+    points = [(random.random(), random.random()) for _ in range(n)]
+    d = [[math.hypot(a[0] - b[0], a[1] - b[1]) for b in points]
+         for a in points]
+    if not symmetric:
+        d = [[x * random.uniform(0.5, 1.5) for x in row] for row in d]
+    return d
+
+
+@pytest.mark.parametrize('move_type', ['swap', 'insert', 'reverse'])
+@pytest.mark.parametrize('n', [4, 5, 12])
+def test_move_deltas_are_exact(move_type, n):
+    random.seed(n)
+    tour = PermutationAnnealer(random_matrix(n), initial_state=list(range(n)),
+                               seed=n)
+    tour.move_types = (move_type,)
+    E = tour.energy()
+    for _ in range(300):
+        before = tour.state[:]
+        E += tour.move()
+        assert E == pytest.approx(tour.energy())
+        assert sorted(tour.state) == list(range(n))
+        tour.undo()
+        assert tour.state == before
+        E = tour.energy()
+        # keep the move this time
+        E += tour.move()
+
+
+def edges(tour):
+    return set(frozenset(edge) for edge in zip(tour, tour[1:] + tour[:1]))
+
+
+def test_reverse_shorter_side():
+    random.seed(3)
+    n = 10
+    tour = PermutationAnnealer(random_matrix(n), initial_state=list(range(n)))
+    E = tour.energy()
+    E += tour.reverse(1, 8)
+    # the two nodes outside 1..8 were reversed instead
+    assert tour.state == [9] + list(range(1, 9)) + [0]
+    assert edges(tour.state) == edges([0] + list(range(8, 0, -1)) + [9])
+    assert E == pytest.approx(tour.energy())
+    tour.undo()
+    assert tour.state == list(range(n))
+
+
+def test_asymmetric_moves():
+    random.seed(1)
+    n = 10
+    tour = PermutationAnnealer(random_matrix(n, symmetric=False),
+                               initial_state=list(range(n)))
+    tour.move_types = ('swap', 'insert')
+    E = tour.energy()
+    for _ in range(300):
+        E += tour.move()
+        assert E == pytest.approx(tour.energy())
+
+
+def test_permutation_anneal_labels():
+    # a dict of dicts keyed by city name works as well
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+
+    tsp = PermutationAnnealer(distance_matrix, initial_state=init_state)
+    tsp.steps = 20000
+    tsp.updates = 0
+    tsp.instrument = True
+
+    state, e = tsp.anneal()
+
+    assert sorted(state) == sorted(cities)
+    assert e == pytest.approx(tsp.energy())
+    # moves return deltas and rejected moves are undone
+    assert tsp.stats.calls['energy'] == 1
+    assert tsp.stats.calls['copy_prev'] == 0
+
+
+def test_pickle_and_replace_matrix():
+    tsp = PermutationAnnealer(distance_matrix, initial_state=sorted(cities))
+    copy = pickle.loads(pickle.dumps(tsp))
+    assert copy.energy() == pytest.approx(tsp.energy())
+    E = copy.energy()
+    E += copy.move()
+    assert E == pytest.approx(copy.energy())
+
+    # moves follow a matrix assigned after construction
+    random.seed(4)
+    n = 6
+    tsp.distance_matrix = random_matrix(n)
+    tsp.state = list(range(n))
+    E = tsp.energy()
+    E += tsp.swap(1, 4)
+    assert E == pytest.approx(tsp.energy())
@@ -0,0 +1,80 @@
+import json
+import logging
+import random
+import time
+
+from helper import cities, distance_matrix
+from simanneal.reporters import (
+    JSONLinesReporter, LoggingReporter, NullReporter, Reporter,
+    ThreadedReporter)
+from test_anneal import TravellingSalesmanProblem
+
+try:
+    from io import StringIO
+except ImportError:  # pragma: no cover
+    from StringIO import StringIO
+
+
+class ListReporter(Reporter):
+    """Collects updates in a list."""
+
+    def __init__(self, delay=0.0):
+        self.updates = []
+        self.closed = False
+        self.delay = delay
+
+    def update(self, annealer, step, T, E, acceptance, improvement):
+        time.sleep(self.delay)
+        self.updates.append(step)
+
+    def close(self):
+        self.closed = True
+
+
+def make_tsp(reporter):
+    init_state = list(cities.keys())
+    random.shuffle(init_state)
+    tsp = TravellingSalesmanProblem(distance_matrix, initial_state=init_state)
+    tsp.copy_strategy = "slice"
+    tsp.steps = 5000
+    tsp.updates = 10
+    tsp.reporter = reporter
+    return tsp
+
+
+def test_null_reporter(capsys):
+    make_tsp(NullReporter()).anneal()
+    captured = capsys.readouterr()
+    assert captured.out == captured.err == ''
+
+
+def test_json_lines_reporter():
+    stream = StringIO()
+    tsp = make_tsp(JSONLinesReporter(stream))
+    state, e = tsp.anneal()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line['step'] for line in lines] == list(range(0, 5001, 500))
+    assert lines[0]['acceptance'] is None
+    assert lines[-1]['best_energy'] == e
+    assert all(0.0 <= line['acceptance'] <= 1.0 for line in lines[1:])
+
+
+def test_logging_reporter(caplog):
+    caplog.set_level(logging.INFO, logger='simanneal')
+    make_tsp(LoggingReporter()).anneal()
+    assert len(caplog.records) == 11
+    assert caplog.records[-1].getMessage().startswith('step 5000: T=2.50000')
+
+
+def test_threaded_reporter():
+    reporter = ListReporter(delay=0.01)
+    tsp = make_tsp(ThreadedReporter(reporter))
+    tsp.updates = 100
+    tsp.anneal()
+
+    # slow updates are skipped, but the last one always arrives
+    assert reporter.closed
+    assert 0 < len(reporter.updates) <= 101
+    assert reporter.updates[-1] == 5000
+    assert reporter.updates == sorted(reporter.updates)
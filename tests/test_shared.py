@@ -0,0 +1,94 @@
+import multiprocessing
+import pickle
+import random
+
+import pytest
+
+from helper import cities
+from simanneal.permutation import PermutationAnnealer
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('multiprocessing.shared_memory')
+
+from simanneal.distance import DistanceMatrix  # noqa: E402
+from simanneal.shared import SharedArray  # noqa: E402
+
+
+def _total(shared):
+    return float(shared.array.sum())
+
+
+def test_shared_array():
+    data = np.arange(12.0).reshape(3, 4)
+    with SharedArray(data) as shared:
+        assert np.array_equal(shared.array, data)
+        assert shared[1, 2] == 6.0
+        assert len(shared) == 3
+        assert not shared.array.flags['WRITEABLE']
+
+        # pickles by name, not by value
+        pickled = pickle.dumps(shared)
+        assert shared.name.encode('utf-8') in pickled
+        copy = pickle.loads(pickled)
+        assert not copy.owner
+        assert np.array_equal(copy.array, data)
+        copy.close()
+
+        pool = multiprocessing.Pool(2)
+        try:
+            totals = pool.map(_total, [shared] * 4)
+        finally:
+            pool.close()
+            pool.join()
+        assert totals == [data.sum()] * 4
+    assert shared.shm is None
+
+
+def test_shared_array_rejects_objects():
+    with pytest.raises(ValueError):
+        SharedArray(np.array([object()]))
+
+
+def test_shared_distance_matrix():
+    matrix = DistanceMatrix.from_coordinates(cities)
+    shared = matrix.share()
+    try:
+        assert np.array_equal(shared.array, matrix.array)
+        assert shared.labels == matrix.labels
+
+        state = list(range(len(matrix)))
+        random.shuffle(state)
+        tsp = PermutationAnnealer(shared, initial_state=state)
+        assert len(pickle.dumps(shared)) < matrix.array.nbytes
+        tsp.steps = 2000
+        tsp.updates = 0
+        state, e, energies = tsp.anneal_parallel(4, workers=2, seed=42)
+        assert sorted(state) == list(range(len(matrix)))
+        assert e == pytest.approx(matrix.tour_length(state))
+    finally:
+        shared.close()
+
+
+def test_use_after_close():
+    matrix = DistanceMatrix.from_coordinates(cities)
+    shared = matrix.share()
+    tsp = PermutationAnnealer(shared, initial_state=list(range(len(matrix))))
+    shared.close()
+
+    # views still held by the annealer stay mapped
+    E = matrix.tour_length(tsp.state)
+    for _ in range(100):
+        E += tsp.move()
+    assert E == pytest.approx(matrix.tour_length(tsp.state))
+
+    # the closed matrix and array refuse to be used
+    with pytest.raises(ValueError):
+        shared.distance(0, 1)
+    with pytest.raises(ValueError):
+        shared[0]
+    with pytest.raises(ValueError):
+        shared.tour_length(tsp.state)
+    with pytest.raises(ValueError):
+        shared.shared[0]
+    with pytest.raises(ValueError):
+        pickle.dumps(shared)